@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, insert, literal
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app import stats
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models import Activity, ActivityArchive, Lead, LeadArchive
+
+log = logging.getLogger(__name__)
+
+# Hot/cold split for soft-deleted leads. A deleted lead stays in `lead` (restorable in
+# place) for ARCHIVE_AFTER_DAYS, then it and its activities move to lead_archive /
+# activity_archive, so the hot tables and their indexes only grow with live leads.
+# Archived leads can still be restored; ARCHIVE_RETENTION_DAYS > 0 purges them for good.
+# Moving rows doesn't change the dashboard counters; reconcile counts both sides.
+
+LEAD_FIELDS = [c.name for c in Lead.__table__.columns]
+ACTIVITY_FIELDS = [c.name for c in Activity.__table__.columns]
+
+def _archivable(cutoff: datetime, limit: int):
+    # the newest lead always stays hot: SQLite hands out max(rowid) + 1, so moving it
+    # out would let the next insert reuse its id and block a later restore
+    newest = select(func.max(Lead.id)).scalar_subquery()
+    return (
+        select(Lead.id)
+        .where(Lead.is_active == False, Lead.updated_at < cutoff, Lead.id != newest)
+        .limit(limit)
+    )
+
+async def archive_batch(session: AsyncSession, cutoff: datetime, limit: int) -> tuple[int, int]:
+    """Move up to `limit` leads soft-deleted before `cutoff`; returns (leads, activities)."""
+    ids = list((await session.exec(_archivable(cutoff, limit))).all())
+    if not ids:
+        return 0, 0
+    now = datetime.utcnow()
+    await session.exec(insert(ActivityArchive).from_select(
+        ACTIVITY_FIELDS, select(*(getattr(Activity, f) for f in ACTIVITY_FIELDS)).where(Activity.lead_id.in_(ids)),
+    ))
+    moved = (await session.exec(delete(Activity).where(Activity.lead_id.in_(ids)))).rowcount
+    await session.exec(insert(LeadArchive).from_select(
+        [*LEAD_FIELDS, "archived_at"],
+        select(*(getattr(Lead, f) for f in LEAD_FIELDS), literal(now)).where(Lead.id.in_(ids)),
+    ))
+    await session.exec(delete(Lead).where(Lead.id.in_(ids)))
+    await session.commit()
+    return len(ids), moved
+
+async def purge_batch(session: AsyncSession, cutoff: datetime, limit: int) -> tuple[int, int]:
+    """Drop up to `limit` leads archived before `cutoff` for good; returns (leads, activities)."""
+    rows = (await session.exec(
+        select(LeadArchive.id, LeadArchive.status, LeadArchive.created_at)
+        .where(LeadArchive.archived_at < cutoff).order_by(LeadArchive.archived_at).limit(limit)
+    )).all()
+    if not rows:
+        return 0, 0
+    ids = [r.id for r in rows]
+    dropped = (await session.exec(delete(ActivityArchive).where(ActivityArchive.lead_id.in_(ids)))).rowcount
+    await session.exec(delete(LeadArchive).where(LeadArchive.id.in_(ids)))
+    deltas = stats.activity_deltas(-dropped)
+    for r in rows:
+        stats.lead_deltas(stats.LeadState(r.status, False, r.created_at), -1, deltas)
+    await stats.apply(session, deltas)
+    await session.commit()
+    return len(ids), dropped
+
+async def run(now: datetime | None = None) -> dict:
+    now = now or datetime.utcnow()
+    totals = {"archived_leads": 0, "archived_activities": 0, "purged_leads": 0, "purged_activities": 0}
+    limit = settings.ARCHIVE_BATCH_SIZE
+    # one short transaction per batch so the single writer connection isn't held for long
+    async with SessionLocal() as session:
+        while True:
+            leads, activities = await archive_batch(session, now - timedelta(days=settings.ARCHIVE_AFTER_DAYS), limit)
+            totals["archived_leads"] += leads
+            totals["archived_activities"] += activities
+            if leads < limit:
+                break
+        while settings.ARCHIVE_RETENTION_DAYS > 0:
+            leads, activities = await purge_batch(session, now - timedelta(days=settings.ARCHIVE_RETENTION_DAYS), limit)
+            totals["purged_leads"] += leads
+            totals["purged_activities"] += activities
+            if leads < limit:
+                break
+    return totals
+
+async def archive_periodically(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            totals = await run()
+            if totals["archived_leads"] or totals["purged_leads"]:
+                log.info("lead archive: %s", totals)
+        except Exception:
+            log.exception("lead archival failed")
+
+async def restore_lead(session: AsyncSession, lead_id: int) -> Lead:
+    """Reactivate a soft-deleted lead, moving it back from the archive if needed."""
+    now = datetime.utcnow()
+    lead = await session.get(Lead, lead_id, with_for_update=True)
+    if lead is not None:
+        if lead.is_active:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Lead is not deleted")
+        before = stats.LeadState.of(lead)
+        lead.is_active, lead.updated_at = True, now
+        session.add(lead)
+        await stats.apply(session, stats.lead_transition(before, stats.LeadState.of(lead)))
+        await session.commit()
+        await session.refresh(lead)
+        return lead
+
+    archived = await session.get(LeadArchive, lead_id)
+    if archived is None:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    before = stats.LeadState(archived.status, False, archived.created_at)
+    restored = {"is_active": literal(True), "updated_at": literal(now)}
+    await session.exec(insert(Lead).from_select(
+        LEAD_FIELDS, select(*(restored.get(f, getattr(LeadArchive, f)) for f in LEAD_FIELDS)).where(LeadArchive.id == lead_id),
+    ))
+    # archiving freed these activity ids and SQLite (no AUTOINCREMENT) may have handed
+    # them out again; activities whose id is taken come back under a new one
+    archived = select(ActivityArchive).where(ActivityArchive.lead_id == lead_id)
+    taken = list((await session.exec(
+        select(ActivityArchive.id).where(ActivityArchive.lead_id == lead_id).join(Activity, Activity.id == ActivityArchive.id)
+    )).all())
+    await session.exec(insert(Activity).from_select(
+        ACTIVITY_FIELDS, archived.with_only_columns(*(getattr(ActivityArchive, f) for f in ACTIVITY_FIELDS)).where(ActivityArchive.id.not_in(taken)),
+    ))
+    if taken:
+        renumbered = [f for f in ACTIVITY_FIELDS if f != "id"]
+        await session.exec(insert(Activity).from_select(
+            renumbered, archived.with_only_columns(*(getattr(ActivityArchive, f) for f in renumbered)).where(ActivityArchive.id.in_(taken)),
+        ))
+    await session.exec(delete(ActivityArchive).where(ActivityArchive.lead_id == lead_id))
+    await session.exec(delete(LeadArchive).where(LeadArchive.id == lead_id))
+    await stats.apply(session, stats.lead_transition(before, before._replace(is_active=True)))
+    await session.commit()
+    return await session.get(Lead, lead_id)
@@ -0,0 +1,228 @@
+import codecs
+import csv
+import json
+from collections import Counter
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterable, Sequence
+from fastapi import HTTPException
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app import rollups, stats
+from app.core.config import settings
+from app.models import CONTACT_KEY, Activity, Lead, User, contact_key
+from app.queries import leads_by_email, select_leads
+from app.schemas import ActivityCreate, ActivityOut, LeadCreate, LeadFilter, LeadOut
+
+# Set-based bulk writes: chunked multi-row INSERT ... RETURNING, so ids and server-side
+# values come back in the same round trip instead of one refresh() per row.
+
+def _chunks(rows: Sequence[dict], size: int) -> Iterable[Sequence[dict]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def _dialect_insert(session: AsyncSession):
+    """INSERT with ON CONFLICT support, for the backends that have it."""
+    dialect = session.bind.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        raise HTTPException(status_code=400, detail="Upsert needs SQLite or PostgreSQL")
+    return sqlite.insert if dialect == "sqlite" else postgresql.insert
+
+async def _insert_returning(session: AsyncSession, model, rows: Sequence[dict], statement=None) -> list[dict]:
+    columns = model.__table__.c
+    statement = statement or (lambda chunk: insert(model).values(chunk))
+    out: list[dict] = []
+    for chunk in _chunks(rows, settings.BULK_INSERT_CHUNK_SIZE):
+        # one multi-row VALUES statement per chunk; ids are assigned in VALUES order,
+        # so sorting by id restores the caller's ordering
+        result = await session.exec(statement(list(chunk)).returning(*columns))
+        out.extend(sorted((dict(r._mapping) for r in result.all()), key=lambda r: r["id"]))
+    return out
+
+async def insert_leads(session: AsyncSession, payload: Sequence[LeadCreate], skip_duplicates: bool = False) -> list[LeadOut]:
+    """With `skip_duplicates`, rows whose contact matches a live lead (or an earlier row)
+    are left out (ON CONFLICT DO NOTHING) instead of failing the statement; the caller
+    finds them by comparing the result with `payload`."""
+    now = datetime.utcnow()
+    rows = [
+        {**p.model_dump(), "is_active": True, "created_at": now, "updated_at": now, "activity_count": 0}
+        for p in payload
+    ]
+    statement = None
+    if skip_duplicates:
+        dialect_insert = _dialect_insert(session)
+        statement = lambda chunk: dialect_insert(Lead).values(chunk).on_conflict_do_nothing(
+            index_elements=list(CONTACT_KEY), index_where=Lead.is_active == True,
+        )
+    inserted = await _insert_returning(session, Lead, rows, statement)
+    deltas, rollup_deltas = Counter(), Counter()
+    for r in inserted:
+        stats.lead_deltas(stats.LeadState(r["status"], r["is_active"], r["created_at"]), 1, deltas)
+        rollups.lead_status_deltas(None, r["status"], now.date(), rollup_deltas)
+    await stats.apply(session, deltas)
+    await rollups.apply(session, rollup_deltas)
+    return [LeadOut.model_validate(r) for r in inserted]
+
+async def upsert_leads(session: AsyncSession, payload: Sequence[LeadCreate]) -> tuple[list[LeadOut], int]:
+    """INSERT ... ON CONFLICT (ux_lead_active_contact) DO UPDATE, chunked like insert_leads.
+
+    A row whose normalized email + phone matches a live lead updates the fields it set
+    explicitly instead of creating a duplicate. Returns one lead per payload row, in
+    payload order, and how many distinct leads were created; rows repeating a contact
+    within the request merge into the same lead, so they count as updates.
+    """
+    dialect_insert = _dialect_insert(session)
+    now = datetime.utcnow()
+    # last row wins within a request: one statement may not touch the same lead twice
+    keys = [contact_key(p.email, p.phone) for p in payload]
+    latest = dict(zip(keys, payload))
+    # rows that set the same fields share a statement, so omitted fields keep their value
+    groups: dict[frozenset, list[LeadCreate]] = {}
+    for p in latest.values():
+        groups.setdefault(frozenset(p.model_fields_set), []).append(p)
+
+    before: dict[int, stats.LeadState] = {}
+    out: dict[int, dict] = {}
+    for fields, group in groups.items():
+        updated_fields = [f for f in LeadCreate.model_fields if f in fields]
+        for chunk in _chunks(group, settings.BULK_INSERT_CHUNK_SIZE):
+            # pre-state of the live leads this chunk can hit, for exact counter deltas
+            existing = leads_by_email(select(Lead.id, Lead.status, Lead.created_at), [p.email for p in chunk])
+            for r in (await session.exec(existing)).all():
+                if r.id not in out:
+                    before.setdefault(r.id, stats.LeadState(r.status, True, r.created_at))
+            stmt = dialect_insert(Lead).values([
+                {**p.model_dump(), "is_active": True, "created_at": now, "updated_at": now, "activity_count": 0} for p in chunk
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(CONTACT_KEY), index_where=Lead.is_active == True,
+                set_={**{f: stmt.excluded[f] for f in updated_fields}, "updated_at": now},
+            )
+            for r in (await session.exec(stmt.returning(*Lead.__table__.c))).all():
+                out[r.id] = dict(r._mapping)
+
+    deltas, rollup_deltas = Counter(), Counter()
+    for lead_id, r in out.items():
+        after = stats.LeadState(r["status"], True, r["created_at"])
+        old = before.get(lead_id)
+        if old is None:
+            stats.lead_deltas(after, 1, deltas)
+        elif old != after:
+            stats.lead_transition(old, after, deltas)
+        rollups.lead_status_deltas(old and old.status, after.status, now.date(), rollup_deltas)
+    await stats.apply(session, deltas)
+    await rollups.apply(session, rollup_deltas)
+    created = sum(1 for lead_id in out if lead_id not in before)
+    by_key = {contact_key(r["email"], r["phone"]): LeadOut.model_validate(r) for r in out.values()}
+    return [by_key[key] for key in keys], created
+
+async def update_leads(session: AsyncSession, ids: Sequence[int] | None, f: LeadFilter | None, values: dict) -> list[int]:
+    """One set-based UPDATE over the active leads picked by `ids` or `f`, stamping updated_at
+    and keeping the dashboard counters in step. Returns the updated ids; the caller commits."""
+    stmt = select_leads(select(Lead.id, Lead.status, Lead.is_active, Lead.created_at), ids, f)
+    rows = (await session.exec(stmt.with_for_update().limit(settings.LEAD_BATCH_MAX + 1))).all()
+    if len(rows) > settings.LEAD_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Selection matches more than {settings.LEAD_BATCH_MAX} leads")
+    if not rows:
+        return []
+    ids = [r.id for r in rows]
+    await session.exec(update(Lead).where(Lead.id.in_(ids)).values(**values, updated_at=datetime.utcnow()))
+    deltas, rollup_deltas = Counter(), Counter()
+    today = datetime.utcnow().date()
+    for r in rows:
+        before = stats.LeadState(r.status, r.is_active, r.created_at)
+        after = stats.LeadState(values.get("status", r.status), values.get("is_active", r.is_active), r.created_at)
+        if after != before:
+            stats.lead_transition(before, after, deltas)
+            rollups.lead_status_deltas(before.status, after.status, today, rollup_deltas)
+    await stats.apply(session, deltas)
+    await rollups.apply(session, rollup_deltas)
+    return ids
+
+async def bump_activity_count(session: AsyncSession, lead_id: int, n: int) -> bool:
+    # bump the counter in SQL before inserting: concurrent posts can't lose increments,
+    # the lead row is never loaded, and the row lock doubles as the existence check
+    bumped = await session.exec(
+        update(Lead)
+        .where(Lead.id == lead_id, Lead.is_active == True)
+        .values(activity_count=Lead.activity_count + n)
+    )
+    return bool(bumped.rowcount)
+
+def activity_rows(lead_id: int, user: User, payload: Sequence[ActivityCreate], now: datetime | None = None) -> list[dict]:
+    now = now or datetime.utcnow()
+    user_name = f"{user.first_name} {user.last_name}"
+    return [
+        {**p.model_dump(), "lead_id": lead_id, "user_id": user.id, "user_name": user_name, "created_at": now}
+        for p in payload
+    ]
+
+async def insert_activity_rows(session: AsyncSession, rows: Sequence[dict]) -> list[ActivityOut]:
+    """Insert prepared activity rows; callers have already bumped the lead counters."""
+    inserted = await _insert_returning(session, Activity, rows)
+    await stats.apply(session, stats.activity_deltas(len(inserted)))
+    await rollups.apply(session, rollups.activity_deltas(inserted))
+    return [ActivityOut.model_validate(r) for r in inserted]
+
+async def insert_activities(session: AsyncSession, lead_id: int, user: User, payload: Sequence[ActivityCreate]) -> list[ActivityOut]:
+    if not await bump_activity_count(session, lead_id, len(payload)):
+        raise HTTPException(status_code=404, detail="Lead not found")
+    return await insert_activity_rows(session, activity_rows(lead_id, user, payload))
+
+# --- streaming import parsing -------------------------------------------------------
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buf = ""
+    async for chunk in chunks:
+        buf += decoder.decode(chunk)
+        *lines, buf = buf.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buf += decoder.decode(b"", final=True)
+    if buf.strip():
+        yield buf.rstrip("\r")
+
+async def iter_records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[tuple[int, dict[str, Any] | Exception]]:
+    """Yield `(row_number, record)` pairs; unparsable rows yield the exception instead."""
+    row = 0
+    if fmt == "ndjson":
+        async for line in lines:
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+                yield row, record
+            except ValueError as e:
+                yield row, e
+        return
+
+    header: list[str] | None = None
+    pending = ""
+    async for line in lines:
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue  # newline inside a quoted field, keep reading
+        if not pending.strip():
+            pending = ""
+            continue
+        try:
+            fields = next(csv.reader([pending]))
+        except csv.Error as e:
+            row += 1
+            pending = ""
+            yield row, e
+            continue
+        pending = ""
+        if header is None:
+            header = [h.strip() for h in fields]
+            continue
+        row += 1
+        # empty cells mean "not provided" so optional fields keep their defaults
+        yield row, {k: v for k, v in zip(header, fields) if v != ""}
+    if pending:
+        yield row + 1, ValueError("unterminated quoted field")
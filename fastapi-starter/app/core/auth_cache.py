@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from app.core.config import settings
+from app.models import User
+
+# LRU of authenticated users keyed by bearer token. Entries expire at the token's
+# own `exp` (capped by `max_ttl`) so a cached principal never outlives its credential.
+class PrincipalCache:
+    def __init__(self, maxsize: int, max_ttl: float):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple[float, User]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, token: str) -> User | None:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, user = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return user
+
+    def put(self, token: str, user: User, exp: float | None) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = time.time() + self.max_ttl
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        with self._lock:
+            self._entries[token] = (expires_at, user)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, username: str) -> None:
+        with self._lock:
+            stale = [t for t, (_, u) in self._entries.items() if u.username == username]
+            for t in stale:
+                del self._entries[t]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+principal_cache = PrincipalCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
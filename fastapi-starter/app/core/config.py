@@ -6,6 +6,57 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
     DATABASE_URL: str = "sqlite+aiosqlite:///./app.db"
+    AUTH_CACHE_SIZE: int = 1024
+    AUTH_CACHE_TTL_SECONDS: int = 300
+    HASH_POOL_KIND: str = "thread"  # "thread" or "process"
+    HASH_WORKERS: int = 4  # 0 hashes inline on the event loop
+    HASH_MAX_PENDING: int = 64
+    HASH_RETRY_AFTER_SECONDS: int = 1
+    STATS_RECONCILE_SECONDS: int = 900  # 0 disables periodic dashboard reconciliation
+    BULK_INSERT_CHUNK_SIZE: int = 500
+    IMPORT_BATCH_SIZE: int = 1000
+    IMPORT_MAX_ERRORS: int = 1000  # per-row errors reported back; the failed count is always exact
+    EXPORT_CHUNK_SIZE: int = 2000
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    LEAD_BATCH_MAX: int = 10_000  # leads one batch-get/update/delete call may touch
+    DB_POOL_SIZE: int = 5  # read pool (SQLite) / shared pool (other backends)
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_SPLIT_READ_WRITE: bool = True  # SQLite: query_only read pool + one serialized writer connection
+    SQLITE_JOURNAL_MODE: str = "wal"
+    SQLITE_SYNCHRONOUS: str = "normal"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE: int = -64000  # negative = KiB, positive = pages
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    LEAD_PAGE_MAX: int = 500  # largest `size` GET /api/leads accepts
+    ACTIVITY_PAGE_SIZE: int = 100  # default timeline page; callers may ask for up to ACTIVITY_PAGE_MAX
+    ACTIVITY_PAGE_MAX: int = 500
+    ACTIVITY_INGEST_QUEUE_SIZE: int = 10_000  # activities accepted but not yet committed
+    ACTIVITY_INGEST_BATCH_SIZE: int = 1000  # activities per group commit
+    ACTIVITY_INGEST_FLUSH_MS: int = 50  # max wait to fill a batch
+    ACTIVITY_INGEST_RETRY_AFTER_SECONDS: int = 1
+    ACTIVITY_INGEST_TICKETS_KEPT: int = 10_000  # finished tickets remembered for status lookups
+    METRICS_ENABLED: bool = True
+    SLOW_REQUEST_MS: int = 0  # log requests slower than this with their SQL; 0 disables
+    SLOW_REQUEST_MAX_STATEMENTS: int = 50
+    ARCHIVE_AFTER_DAYS: int = 30  # soft-deleted leads stay hot (restorable in place) this long
+    ARCHIVE_RETENTION_DAYS: int = 0  # purge archived leads after this many days; 0 keeps them
+    ARCHIVE_INTERVAL_SECONDS: int = 3600  # 0 disables periodic archival
+    ARCHIVE_BATCH_SIZE: int = 500
+    REPORT_DEFAULT_DAYS: int = 90
+    REPORT_MAX_DAYS: int = 3660
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_AUTH_PER_MINUTE: int = 30  # per client IP: login, token, register
+    RATE_LIMIT_SEARCH_PER_MINUTE: int = 120  # per user, from here on; 0 = unlimited
+    RATE_LIMIT_READ_PER_MINUTE: int = 1200
+    RATE_LIMIT_WRITE_PER_MINUTE: int = 600
+    RATE_LIMIT_BULK_PER_MINUTE: int = 60  # lead creates/imports, batch calls, exports
+    RATE_LIMIT_BURST_SECONDS: int = 10  # bucket capacity, in seconds of budget
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    MAX_CONCURRENT_REQUESTS: int = 64  # 0 disables load shedding
+    SHED_QUEUE_TIMEOUT_MS: int = 250  # 503 once a request has waited this long for a slot
+    SHED_RETRY_AFTER_SECONDS: int = 1
+    STARTUP_BUDGET_MS: int = 0  # warn when import + startup take longer; 0 disables
     CORS_ORIGINS: List[str] = ["http://localhost:5173", "http://localhost:3000", "http://localhost:8081", "http://127.0.0.1:8081"]
     class Config:
         env_file = ".env"
@@ -0,0 +1,35 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Sequence
+from fastapi import HTTPException
+
+# Opaque keyset-pagination cursors: the sort key of the last row on a page,
+# JSON-encoded and base64url'd so clients treat it as a token, not a contract.
+
+def _encode_value(v: Any) -> Any:
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    return v
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def decode_cursor(token: str, types: Sequence[type]) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("wrong arity")
+        out = []
+        for v, t in zip(values, types):
+            if t is datetime:
+                out.append(datetime.fromisoformat(v))
+            elif t is date:
+                out.append(date.fromisoformat(v))
+            else:
+                out.append(t(v))
+        return tuple(out)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
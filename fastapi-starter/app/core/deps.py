@@ -1,19 +1,28 @@
-from typing import Annotated
-from fastapi import Depends, HTTPException, status
+from datetime import date
+from typing import Annotated, Optional
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.auth_cache import principal_cache
 from app.core.config import settings
-from app.database import get_session
+from app.core.ratelimit import limiter
+from app.database import get_read_session
 from app.models import User
+from app.schemas import ActivityFilter, LeadFilter
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/token")
 
 async def get_current_user(
+    request: Request,
     token: Annotated[str, Depends(oauth2_scheme)],
-    session: Annotated[AsyncSession, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_read_session)],
 ) -> User:
+    cached = principal_cache.get(token)
+    if cached is not None:
+        limiter.check(request, cached.username)
+        return cached
+    from jose import JWTError, jwt  # imported on first use, see app/core/security.py
     cred_exc = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -30,4 +39,24 @@ async def get_current_user(
     user = result.first()
     if not user:
         raise cred_exc
+    # detach so the cached instance can be shared across requests/sessions
+    session.expunge(user)
+    principal_cache.put(token, user, payload.get("exp"))
+    limiter.check(request, user.username)
     return user
+
+def lead_filters(
+    q: Optional[str] = Query(None, description="search in name/email/phone"),
+    status_f: Optional[str] = Query(None, alias="status"),
+    source: Optional[str] = None,
+    min_budget: Optional[int] = None,
+    max_budget: Optional[int] = None,
+) -> LeadFilter:
+    return LeadFilter(q=q, status=status_f, source=source, min_budget=min_budget, max_budget=max_budget)
+
+def activity_filters(
+    date_from: Optional[date] = Query(None, alias="from", description="activity_date on or after (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, alias="to", description="activity_date on or before (YYYY-MM-DD)"),
+    activity_type: Optional[str] = None,
+) -> ActivityFilter:
+    return ActivityFilter(date_from=date_from, date_to=date_to, activity_type=activity_type)
@@ -0,0 +1,38 @@
+import hashlib
+from typing import Any
+from fastapi import HTTPException, Request, status
+
+# Strong ETags for lead reads. They're derived from row versions rather than from the
+# response body, so a conditional GET is answered from a one-row version lookup
+# without loading or serializing the payload.
+#   lead:        (id, updated_at, activity_count)
+#   activities:  (lead id, activity_count, newest activity id), activities are append-only
+
+CACHE_CONTROL = "private, no-cache"  # clients may keep a copy but must revalidate
+
+def make_etag(kind: str, *version: Any) -> str:
+    raw = ":".join([kind, *(v.isoformat() if hasattr(v, "isoformat") else str(v) for v in version)])
+    return '"' + hashlib.blake2b(raw.encode(), digest_size=12).hexdigest() + '"'
+
+def _tags(header: str) -> list[str]:
+    return [t.strip() for t in header.split(",") if t.strip()]
+
+def not_modified(request: Request, etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/"x" matches "x"."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = _tags(header)
+    return "*" in tags or etag in (t.removeprefix("W/") for t in tags)
+
+def check_if_match(request: Request, etag: str) -> None:
+    """If-Match uses the strong comparison; a mismatch means the client's copy is stale."""
+    header = request.headers.get("if-match")
+    if not header:
+        return
+    tags = _tags(header)
+    if "*" not in tags and etag not in tags:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Lead was modified; reload and retry")
+
+def etag_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
@@ -0,0 +1,203 @@
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Sequence
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.config import settings
+
+log = logging.getLogger("app.slow_requests")
+
+# Per-request instrumentation: a pure ASGI middleware opens a RequestStats in a
+# contextvar, SQLAlchemy cursor events and the timed pool add to it, and everything
+# ends up in process-local histograms rendered in Prometheus text format at /metrics.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name, self.help, self.labels, self.buckets = name, help, tuple(labels), tuple(buckets)
+        self._series: dict[tuple, list] = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+        i = bisect_left(self.buckets, value)
+        if i < len(self.buckets):
+            series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, series in sorted(self._series.items()):
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, values))
+            sep = "," if labels else ""
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {series[-1]}")
+        return lines
+
+    def totals(self) -> dict[tuple, tuple[float, int]]:
+        """(sum, count) per label set."""
+        return {values: (series[-2], series[-1]) for values, series in self._series.items()}
+
+    def reset(self) -> None:
+        self._series.clear()
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._series: dict[tuple, int] = {}
+
+    def inc(self, *label_values: str, n: int = 1) -> None:
+        self._series[label_values] = self._series.get(label_values, 0) + n
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, n in sorted(self._series.items()):
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, values))
+            lines.append(f"{self.name}{{{labels}}} {n}")
+        return lines
+
+    def totals(self) -> dict[tuple, int]:
+        return dict(self._series)
+
+    def reset(self) -> None:
+        self._series.clear()
+
+ROUTE_LABELS = ("method", "route")
+
+request_latency = Histogram("http_request_duration_seconds", "Request latency by route template.", (*ROUTE_LABELS, "status"), LATENCY_BUCKETS)
+request_statements = Histogram("http_request_db_statements", "SQL statements executed per request.", ROUTE_LABELS, COUNT_BUCKETS)
+request_db_time = Histogram("http_request_db_seconds", "Total time spent in SQL per request.", ROUTE_LABELS, LATENCY_BUCKETS)
+request_pool_wait = Histogram("http_request_db_pool_wait_seconds", "Time spent waiting for pooled connections per request.", ROUTE_LABELS, LATENCY_BUCKETS)
+pool_wait = Histogram("db_pool_checkout_wait_seconds", "Connection pool checkout wait, requests and background work.", ("pool",), LATENCY_BUCKETS)
+HISTOGRAMS = [request_latency, request_statements, request_db_time, request_pool_wait, pool_wait]
+rejected = Counter("http_requests_rejected_total", "Requests turned away by rate limiting (429) or load shedding (503).", ("reason", "class"))
+COUNTERS = [rejected]
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds", "pool_wait_seconds", "captured")
+
+    def __init__(self, capture: bool):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.captured: list[tuple[float, str]] | None = [] if capture else None
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+# --- SQLAlchemy hooks -----------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.statements += 1
+    stats.db_seconds += elapsed
+    if stats.captured is not None and len(stats.captured) < settings.SLOW_REQUEST_MAX_STATEMENTS:
+        stats.captured.append((elapsed, statement))
+
+def _handle_error(ctx) -> None:
+    # a failed statement never reaches after_cursor_execute; drop its start time
+    starts = ctx.connection.info.get("query_start") if ctx.connection is not None else None
+    if starts:
+        starts.pop()
+
+def instrument_engine(engine) -> None:
+    """Count and time every statement `engine` runs against the current request."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    # times checkouts, including the wait for a free connection when the pool is exhausted
+    metrics_name = "default"
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - t0
+            pool_wait.observe(waited, self.metrics_name)
+            stats = _current.get()
+            if stats is not None:
+                stats.pool_wait_seconds += waited
+
+def timed_pool(name: str) -> type[TimedAsyncQueuePool]:
+    return type(f"TimedAsyncQueuePool_{name}", (TimedAsyncQueuePool,), {"metrics_name": name})
+
+# --- ASGI middleware ------------------------------------------------------------------
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        slow_ms = settings.SLOW_REQUEST_MS
+        stats = RequestStats(capture=slow_ms > 0)
+        token = _current.set(stats)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - t0
+            _current.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "<unmatched>"))
+            request_latency.observe(elapsed, *labels, str(status))
+            request_statements.observe(stats.statements, *labels)
+            request_db_time.observe(stats.db_seconds, *labels)
+            request_pool_wait.observe(stats.pool_wait_seconds, *labels)
+            if slow_ms > 0 and elapsed * 1000 >= slow_ms:
+                _log_slow(labels, status, elapsed, stats)
+
+def _log_slow(labels: tuple[str, str], status: int, elapsed: float, stats: RequestStats) -> None:
+    lines = [
+        f"slow request {labels[0]} {labels[1]} -> {status} in {elapsed * 1000:.1f}ms: "
+        f"{stats.statements} statements, {stats.db_seconds * 1000:.1f}ms in SQL, "
+        f"{stats.pool_wait_seconds * 1000:.1f}ms waiting for a connection"
+    ]
+    for elapsed_s, statement in stats.captured or ():
+        lines.append(f"  {elapsed_s * 1000:7.2f}ms  {' '.join(statement.split())}")
+    if stats.statements > len(stats.captured or ()):
+        lines.append(f"  ... {stats.statements - len(stats.captured or ())} more")
+    log.warning("\n".join(lines))
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in [*HISTOGRAMS, *COUNTERS]:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def reset() -> None:
+    for metric in [*HISTOGRAMS, *COUNTERS]:
+        metric.reset()
@@ -0,0 +1,147 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from app.core import metrics
+from app.core.config import settings
+
+# In-process abuse protection, two layers:
+#   - token buckets per (route class, caller): the JWT subject once get_current_user has
+#     resolved it, the client IP for the unauthenticated auth routes. Over budget -> 429.
+#   - LoadShedMiddleware caps requests in flight; one that can't get a slot within
+#     SHED_QUEUE_TIMEOUT_MS is answered 503 instead of queueing behind the backlog.
+# Both count rejections in http_requests_rejected_total on /metrics.
+
+BUDGETS = {
+    "auth": "RATE_LIMIT_AUTH_PER_MINUTE",
+    "search": "RATE_LIMIT_SEARCH_PER_MINUTE",
+    "read": "RATE_LIMIT_READ_PER_MINUTE",
+    "write": "RATE_LIMIT_WRITE_PER_MINUTE",
+    "bulk": "RATE_LIMIT_BULK_PER_MINUTE",
+}
+
+BULK_ROUTES = {
+    ("POST", "/api/leads"),
+    ("POST", "/api/leads/import"),
+    ("POST", "/api/leads/batch-get"),
+    ("POST", "/api/leads/batch-update"),
+    ("POST", "/api/leads/batch-delete"),
+    ("GET", "/api/leads/export"),
+    ("GET", "/api/activities/export"),
+}
+
+def route_class(request: Request) -> str:
+    route = request.scope.get("route")
+    key = (request.method, getattr(route, "path", request.url.path))
+    if key in BULK_ROUTES:
+        return "bulk"
+    if key == ("GET", "/api/leads") and request.query_params.get("q"):
+        return "search"
+    return "read" if request.method in ("GET", "HEAD") else "write"
+
+class TokenBucketLimiter:
+    def __init__(self):
+        # (class, caller) -> [tokens, last refill]; LRU-bounded, an evicted caller just
+        # starts again with a full bucket
+        self._buckets: OrderedDict[tuple[str, str], list[float]] = OrderedDict()
+
+    def hit(self, cls: str, caller: str) -> float | None:
+        """Take one token; returns None if allowed, else seconds until the next token."""
+        per_minute = getattr(settings, BUDGETS[cls])
+        if not settings.RATE_LIMIT_ENABLED or per_minute <= 0:
+            return None
+        rate = per_minute / 60
+        capacity = max(1.0, rate * settings.RATE_LIMIT_BURST_SECONDS)
+        now = time.monotonic()
+        key = (cls, caller)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [capacity, now]
+            while len(self._buckets) > settings.RATE_LIMIT_MAX_KEYS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return None
+        return (1 - bucket[0]) / rate
+
+    def check(self, request: Request, caller: str, cls: str | None = None) -> None:
+        cls = cls or route_class(request)
+        retry_after = self.hit(cls, caller)
+        if retry_after is not None:
+            metrics.rejected.inc("rate_limit", cls)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded, retry later",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    def stats(self) -> dict:
+        return {"enabled": settings.RATE_LIMIT_ENABLED, "tracked_callers": len(self._buckets)}
+
+limiter = TokenBucketLimiter()
+
+async def limit_by_client_ip(request: Request) -> None:
+    # login/register have no subject yet; budget them per client address
+    limiter.check(request, request.client.host if request.client else "unknown", "auth")
+
+EXEMPT_PATHS = {"/", "/metrics"}
+
+class LoadShedder:
+    def __init__(self):
+        self._slots: asyncio.Semaphore | None = None
+        self.in_flight = 0
+        self.waiting = 0
+
+    async def acquire(self) -> bool:
+        """Take a request slot; False if none freed up within SHED_QUEUE_TIMEOUT_MS."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(settings.MAX_CONCURRENT_REQUESTS)
+        if self._slots.locked():
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), settings.SHED_QUEUE_TIMEOUT_MS / 1000)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.waiting -= 1
+        else:
+            await self._slots.acquire()
+        self.in_flight += 1
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._slots.release()
+
+    def stats(self) -> dict:
+        return {"limit": settings.MAX_CONCURRENT_REQUESTS, "in_flight": self.in_flight, "waiting": self.waiting}
+
+shedder = LoadShedder()
+
+class LoadShedMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or settings.MAX_CONCURRENT_REQUESTS <= 0 or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        if not await shedder.acquire():
+            metrics.rejected.inc("overload", "-")
+            response = JSONResponse(
+                {"detail": "Server is overloaded, retry later"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(settings.SHED_RETRY_AFTER_SECONDS)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            shedder.release()
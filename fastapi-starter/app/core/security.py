@@ -1,20 +1,81 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from jose import jwt
-from passlib.context import CryptContext
+from fastapi import HTTPException, status
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["argon2", "bcrypt_sha256", "bcrypt"], deprecated="auto")
+# passlib (with its argon2/bcrypt backends) and jose are imported on first use rather
+# than with the app, which keeps them off the cold-start path (see app/core/startup.py)
+_pwd_context = None
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+def pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["argon2", "bcrypt_sha256", "bcrypt"], deprecated="auto")
+    return _pwd_context
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+# argon2/bcrypt take tens of ms per call; run them on a bounded pool so they never
+# block the event loop, and shed load once HASH_MAX_PENDING jobs are in flight.
+_executor: Executor | None = None
+_pending = 0
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if settings.HASH_POOL_KIND == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=settings.HASH_WORKERS, thread_name_prefix="pwhash")
+    return _executor
+
+def shutdown_hash_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+def _hash(password: str) -> str:
+    return pwd_context().hash(password)
+
+def _verify(plain: str, hashed: str) -> bool:
+    return pwd_context().verify(plain, hashed)
+
+async def _run_hash_job(fn, *args):
+    global _pending
+    if settings.HASH_WORKERS <= 0:
+        return fn(*args)
+    if _pending >= settings.HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service busy, retry shortly",
+            headers={"Retry-After": str(settings.HASH_RETRY_AFTER_SECONDS)},
+        )
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _pending -= 1
+
+async def hash_password(password: str) -> str:
+    return await _run_hash_job(_hash, password)
+
+async def verify_password(plain: str, hashed: str) -> bool:
+    return await _run_hash_job(_verify, plain, hashed)
 
 def needs_rehash(hashed: str) -> bool:
-    return pwd_context.needs_update(hashed)
+    return pwd_context().needs_update(hashed)
+
+def hash_pool_stats() -> dict:
+    return {
+        "kind": settings.HASH_POOL_KIND,
+        "workers": settings.HASH_WORKERS,
+        "max_pending": settings.HASH_MAX_PENDING,
+        "pending": _pending,
+    }
 
 def create_access_token(subject: str, expires_minutes: int | None = None) -> str:
+    from jose import jwt
     expire = datetime.now(tz=timezone.utc) + timedelta(
         minutes=expires_minutes or settings.ACCESS_TOKEN_EXPIRE_MINUTES
     )
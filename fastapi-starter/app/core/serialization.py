@@ -0,0 +1,15 @@
+from typing import Any, Iterable, Sequence
+import orjson
+from fastapi.responses import Response
+
+# Read-only list endpoints skip ORM hydration and per-row Pydantic validation: they
+# select the output columns as plain rows and encode them once with orjson.
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+def row_dicts(rows: Iterable[Sequence[Any]], columns: Sequence[str]) -> list[dict[str, Any]]:
+    return [dict(zip(columns, r)) for r in rows]
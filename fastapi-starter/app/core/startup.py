@@ -0,0 +1,48 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+from app.core.config import settings
+
+log = logging.getLogger(__name__)
+
+# Cold-start profile: how long importing app.main took and each step of on_startup.
+# Logged once startup finishes (a warning past STARTUP_BUDGET_MS) and served at
+# GET /__debug/startup; `python -m bench.cold_start` collects it over fresh processes.
+
+class StartupProfile:
+    def __init__(self):
+        self.import_ms: float | None = None
+        self.steps: dict[str, float] = {}
+
+    def imported(self, started: float) -> None:
+        self.import_ms = (time.perf_counter() - started) * 1000
+
+    @asynccontextmanager
+    async def step(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] = (time.perf_counter() - t0) * 1000
+
+    def total_ms(self) -> float:
+        return (self.import_ms or 0) + sum(self.steps.values())
+
+    def report(self) -> dict:
+        return {
+            "import_ms": round(self.import_ms or 0, 1),
+            "steps_ms": {name: round(ms, 1) for name, ms in self.steps.items()},
+            "total_ms": round(self.total_ms(), 1),
+            "budget_ms": settings.STARTUP_BUDGET_MS,
+        }
+
+    def log(self) -> None:
+        steps = ", ".join(f"{name} {ms:.0f}ms" for name, ms in self.steps.items())
+        over = 0 < settings.STARTUP_BUDGET_MS < self.total_ms()
+        log.log(
+            logging.WARNING if over else logging.INFO,
+            "startup %.0fms%s: import %.0fms, %s",
+            self.total_ms(), f" (over the {settings.STARTUP_BUDGET_MS}ms budget)" if over else "", self.import_ms or 0, steps,
+        )
+
+profile = StartupProfile()
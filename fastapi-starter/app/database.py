@@ -1,9 +1,11 @@
 # app/database.py
 from typing import AsyncGenerator
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import SQLModel
+from app.core import metrics
 from app.core.config import settings
+from app import migrations
 
 url = settings.DATABASE_URL
 if "+aiosqlite" not in url and "+asyncpg" not in url and "+asyncmy" not in url:
@@ -11,15 +13,72 @@ if "+aiosqlite" not in url and "+asyncpg" not in url and "+asyncmy" not in url:
         f"DATABASE_URL must be async (sqlite+aiosqlite / postgresql+asyncpg / mysql+asyncmy). Got: {url}"
     )
 
-engine: AsyncEngine = create_async_engine(url, future=True, echo=False)
+is_sqlite = url.startswith("sqlite")
+# an in-memory database only exists inside its own connection, so it can't be split
+split = settings.DB_SPLIT_READ_WRITE and is_sqlite and ":memory:" not in url
+
+def _sqlite_pragmas(query_only: bool):
+    pragmas = [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+    ]
+    if query_only:
+        pragmas.append("PRAGMA query_only=ON")
+
+    def on_connect(dbapi_conn, _record) -> None:
+        cursor = dbapi_conn.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+    return on_connect
+
+def _make_engine(name: str, pool_size: int, max_overflow: int, query_only: bool = False) -> AsyncEngine:
+    kwargs = {
+        "poolclass": metrics.timed_pool(name),
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+    if is_sqlite and ":memory:" in url:
+        kwargs = {}  # StaticPool: one shared connection, sizing doesn't apply
+    eng = create_async_engine(url, future=True, echo=False, **kwargs)
+    if is_sqlite:
+        event.listen(eng.sync_engine, "connect", _sqlite_pragmas(query_only))
+    metrics.instrument_engine(eng)
+    return eng
+
+if split:
+    # SQLite allows one writer at a time: funnel every write through a single pooled
+    # connection (callers queue on the pool instead of spinning on SQLITE_BUSY), and
+    # serve reads from a separate query_only pool that WAL lets run alongside it
+    engine: AsyncEngine = _make_engine("writer", pool_size=1, max_overflow=0)
+    read_engine: AsyncEngine = _make_engine("reader", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW, query_only=True)
+else:
+    engine = read_engine = _make_engine("default", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
 
 SessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+ReadSessionLocal = async_sessionmaker(bind=read_engine, class_=AsyncSession, expire_on_commit=False)
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with SessionLocal() as session:
         # IMPORTANT: use yield (not return)
         yield session
 
+# writer (mutations) and read-only (GET) sessions; get_session is the writer
+get_write_session = get_session
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    async with ReadSessionLocal() as session:
+        yield session
+
 async def init_db() -> None:
     async with engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(migrations.upgrade)
+
+async def dispose_engines() -> None:
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
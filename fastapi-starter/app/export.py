@@ -0,0 +1,51 @@
+import csv
+import io
+import zlib
+from typing import AsyncIterator, Sequence
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.database import ReadSessionLocal
+
+# Constant-memory exports: rows come off a server-side cursor in EXPORT_CHUNK_SIZE
+# partitions and are encoded (and optionally gzipped) one partition at a time.
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+def _encode_csv(columns: Sequence[str], rows, header: bool) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(columns)
+    writer.writerows(rows)
+    return buf.getvalue().encode()
+
+def _encode_ndjson(columns: Sequence[str], rows) -> bytes:
+    return b"".join(orjson.dumps(dict(zip(columns, r)), option=orjson.OPT_APPEND_NEWLINE) for r in rows)
+
+async def _iter_export(stmt, columns: Sequence[str], fmt: str, compress: bool) -> AsyncIterator[bytes]:
+    gz = zlib.compressobj(wbits=31) if compress else None  # wbits=31 -> gzip container
+    # own session: the request-scoped one may already be closed while the body streams
+    async with ReadSessionLocal() as session:
+        result = await session.stream(stmt.execution_options(yield_per=settings.EXPORT_CHUNK_SIZE))
+        first = True
+        async for rows in result.partitions():
+            data = _encode_csv(columns, rows, first) if fmt == "csv" else _encode_ndjson(columns, rows)
+            first = False
+            yield gz.compress(data) if gz else data
+        if fmt == "csv" and first:
+            yield gz.compress(_encode_csv(columns, [], True)) if gz else _encode_csv(columns, [], True)
+    if gz:
+        yield gz.flush()
+
+def export_response(stmt, columns: Sequence[str], fmt: str, compress: bool, name: str) -> StreamingResponse:
+    fmt = fmt.lower()
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    filename = f"{name}.{fmt}" + (".gz" if compress else "")
+    return StreamingResponse(
+        _iter_export(stmt, columns, fmt, compress),
+        media_type="application/gzip" if compress else FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
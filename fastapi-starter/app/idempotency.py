@@ -0,0 +1,54 @@
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any
+import orjson
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.models import IdempotencyKey
+
+# `Idempotency-Key` support for POST /api/leads. The response is stored in the same
+# transaction as the leads it created, so a retry either finds it and gets the original
+# response replayed, or finds nothing because the first attempt never committed. Keys are
+# scoped per user and expire after IDEMPOTENCY_KEY_TTL_HOURS.
+
+HEADER = "idempotency-key"
+
+def fingerprint(payload: Any, params: dict) -> str:
+    # query parameters change what the same body does (e.g. upsert), so they count too
+    body = orjson.dumps(jsonable_encoder({"params": params, "body": payload}), option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+def _cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+async def replay(session: AsyncSession, user_id: int, key: str, payload: Any, params: dict) -> Response | None:
+    """The stored response for `key`, or None if this is the first attempt."""
+    if len(key) > 255:
+        raise HTTPException(status_code=400, detail="Idempotency-Key is too long")
+    stored = await session.get(IdempotencyKey, (user_id, key))
+    if stored is None:
+        return None
+    if stored.created_at < _cutoff():
+        session.expunge(stored)  # remember() deletes expired keys before storing the new one
+        return None
+    if stored.fingerprint != fingerprint(payload, params):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request",
+        )
+    return Response(
+        content=stored.body, status_code=stored.status_code, media_type="application/json",
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+async def remember(session: AsyncSession, user_id: int, key: str, payload: Any, params: dict, status_code: int, result: Any) -> bytes:
+    """Store the response for `key` in the caller's transaction; returns the encoded body."""
+    body = orjson.dumps(jsonable_encoder(result))
+    await session.exec(delete(IdempotencyKey).where(IdempotencyKey.created_at < _cutoff()))
+    session.add(IdempotencyKey(
+        user_id=user_id, key=key, fingerprint=fingerprint(payload, params), status_code=status_code, body=body.decode(),
+    ))
+    return body
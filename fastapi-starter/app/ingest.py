@@ -0,0 +1,201 @@
+import asyncio
+import contextvars
+import logging
+import uuid
+from collections import OrderedDict
+from typing import Sequence
+from fastapi import HTTPException, status
+from sqlmodel import select
+from app.bulk import activity_rows, bump_activity_count, insert_activity_rows
+from app.core.config import settings
+from app.database import ReadSessionLocal, SessionLocal
+from app.models import Lead, User
+from app.schemas import ActivityCreate, ActivityIngestStatus
+
+log = logging.getLogger(__name__)
+
+# Write-behind activity ingestion (opt-in with `Prefer: respond-async`). Requests are
+# validated, queued and acknowledged with a ticket; one background task coalesces
+# queued tickets into group commits of up to ACTIVITY_INGEST_BATCH_SIZE activities,
+# flushing at least every ACTIVITY_INGEST_FLUSH_MS. Shutdown drains the queue.
+# Tickets live in this process only: with several workers, a status lookup that lands
+# on another process gets 404, so route it back (sticky sessions) or use the sync path.
+
+class _Ticket:
+    __slots__ = ("id", "user_id", "lead_id", "rows", "count", "status", "activity_ids", "detail")
+
+    def __init__(self, user_id: int, lead_id: int, rows: list[dict]):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.lead_id = lead_id
+        self.rows = rows
+        self.count = len(rows)
+        self.status = "queued"
+        self.activity_ids: list[int] | None = None
+        self.detail: str | None = None
+
+    def to_status(self) -> ActivityIngestStatus:
+        return ActivityIngestStatus(
+            ticket=self.id, status=self.status, lead_id=self.lead_id, queued=self.count,
+            activity_ids=self.activity_ids, detail=self.detail,
+        )
+
+_STOP = object()
+
+class ActivityIngestor:
+    def __init__(self):
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._tickets: OrderedDict[str, _Ticket] = OrderedDict()
+        self._pending = 0  # activities accepted but not yet committed or failed
+        self.committed = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self) -> None:
+        self._ensure_started()
+
+    def _ensure_started(self) -> asyncio.Queue:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            # a task copies the caller's contextvars; started from a request it would
+            # charge every later batch's SQL to that request's metrics
+            self._worker = contextvars.Context().run(asyncio.create_task, self._run())
+        return self._queue
+
+    async def submit(self, lead_id: int, user: User, payload: Sequence[ActivityCreate]) -> ActivityIngestStatus:
+        if len(payload) > settings.ACTIVITY_INGEST_QUEUE_SIZE:
+            raise HTTPException(status_code=400, detail="Too many activities for one async request")
+        if self._pending + len(payload) > settings.ACTIVITY_INGEST_QUEUE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Activity ingest queue is full, retry later",
+                headers={"Retry-After": str(settings.ACTIVITY_INGEST_RETRY_AFTER_SECONDS)},
+            )
+        # reserve the space before the first await, or concurrent submits all pass the check
+        self._pending += len(payload)
+        try:
+            # cheap read-pool check so unknown leads still fail fast with 404
+            async with ReadSessionLocal() as session:
+                found = (await session.exec(select(Lead.id).where(Lead.id == lead_id, Lead.is_active == True))).first()
+            if found is None:
+                raise HTTPException(status_code=404, detail="Lead not found")
+            ticket = _Ticket(user.id, lead_id, activity_rows(lead_id, user, payload))
+        except BaseException:
+            self._pending -= len(payload)
+            raise
+        self._remember(ticket)
+        self._ensure_started().put_nowait(ticket)
+        return ticket.to_status()
+
+    def lookup(self, ticket_id: str, user_id: int) -> ActivityIngestStatus | None:
+        ticket = self._tickets.get(ticket_id)
+        if ticket is None or ticket.user_id != user_id:
+            return None
+        return ticket.to_status()
+
+    def _remember(self, ticket: _Ticket) -> None:
+        self._tickets[ticket.id] = ticket
+        while len(self._tickets) > settings.ACTIVITY_INGEST_TICKETS_KEPT:
+            oldest = next(iter(self._tickets.values()))
+            if oldest.status == "queued":
+                break  # never forget a ticket that is still in flight
+            self._tickets.popitem(last=False)
+
+    async def _run(self) -> None:
+        queue = self._queue
+        stopping = False
+        while not stopping:
+            first = await queue.get()
+            if first is _STOP:
+                return
+            batch, size = [first], first.count
+            deadline = asyncio.get_running_loop().time() + settings.ACTIVITY_INGEST_FLUSH_MS / 1000
+            while size < settings.ACTIVITY_INGEST_BATCH_SIZE:
+                try:
+                    timeout = deadline - asyncio.get_running_loop().time()
+                    item = queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(queue.get(), timeout)
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+                if item is _STOP:
+                    stopping = True
+                    # drain whatever arrived before the stop marker into this batch
+                    while not queue.empty():
+                        batch.append(queue.get_nowait())
+                    break
+                batch.append(item)
+                size += item.count
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[_Ticket]) -> None:
+        done = []
+        try:
+            done.append((batch, await self._commit(batch)))
+        except Exception:
+            # one bad ticket shouldn't sink its neighbours: retry them one by one
+            log.exception("activity group commit of %d tickets failed, retrying individually", len(batch))
+            for ticket in batch:
+                try:
+                    done.append(([ticket], await self._commit([ticket])))
+                except Exception as e:
+                    self._finish(ticket, "failed", detail=f"Insert failed: {e}")
+        # only the commit itself is retried: these rows are in, whatever happens below
+        for tickets, (out, missing) in done:
+            try:
+                self._settle(tickets, out, missing)
+            except Exception:
+                log.exception("bookkeeping after an activity group commit failed")
+                for ticket in tickets:
+                    self._finish(ticket, "committed")
+        self.batches += 1
+
+    async def _commit(self, batch: list[_Ticket]) -> tuple[list, set[int]]:
+        """Insert the batch in one transaction; returns (inserted rows, leads not found)."""
+        per_lead: dict[int, int] = {}
+        for ticket in batch:
+            per_lead[ticket.lead_id] = per_lead.get(ticket.lead_id, 0) + ticket.count
+        async with SessionLocal() as session:
+            missing = {lead_id for lead_id, n in per_lead.items() if not await bump_activity_count(session, lead_id, n)}
+            live = [t for t in batch if t.lead_id not in missing]
+            out = await insert_activity_rows(session, [row for t in live for row in t.rows])
+            await session.commit()
+        return out, missing
+
+    def _settle(self, batch: list[_Ticket], out: list, missing: set[int]) -> None:
+        ids = iter(a.id for a in out)  # RETURNING rows come back in insertion order
+        for ticket in batch:
+            if ticket.lead_id in missing:
+                self._finish(ticket, "failed", detail="Lead not found")
+            else:
+                self._finish(ticket, "committed", activity_ids=[next(ids) for _ in range(ticket.count)])
+
+    def _finish(self, ticket: _Ticket, state: str, activity_ids: list[int] | None = None, detail: str | None = None) -> None:
+        if ticket.status != "queued":
+            return
+        ticket.status, ticket.activity_ids, ticket.detail = state, activity_ids, detail
+        self._pending -= ticket.count
+        if state == "committed":
+            self.committed += ticket.count
+        else:
+            self.failed += ticket.count
+        ticket.rows = []  # the payload isn't needed once the outcome is known
+
+    async def drain(self) -> None:
+        """Flush everything accepted so far and stop the worker (app shutdown)."""
+        if self._worker is None or self._worker.done():
+            return
+        self._queue.put_nowait(_STOP)
+        await self._worker
+        self._worker = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._worker is not None and not self._worker.done(),
+            "pending": self._pending,
+            "committed": self.committed,
+            "failed": self.failed,
+            "batches": self.batches,
+            "tickets": len(self._tickets),
+        }
+
+ingestor = ActivityIngestor()
@@ -1,31 +1,75 @@
+import time
+_import_started = time.perf_counter()  # app/core/startup.py: import time counts from here
+import asyncio
 from fastapi import FastAPI, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy.exc import IntegrityError
+from app.core import metrics
+from app.core.ratelimit import LoadShedMiddleware, limiter, shedder
+from app.core.auth_cache import principal_cache
 from app.core.config import settings
-from app.database import init_db, engine, get_session
-from app.routers import auth, leads, activities, dashboard
+from app.core.security import shutdown_hash_pool, hash_pool_stats
+from app.core.startup import profile
+from app import archive, stats
+from app.ingest import ingestor
+from app.database import init_db, engine, read_engine, dispose_engines, get_session
+from app.routers import auth, leads, activities, dashboard, reports
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 app = FastAPI(title="CRM API (async)", version="2.1.0")
 
+# innermost of the three, so 503s from load shedding still carry CORS headers
+app.add_middleware(LoadShedMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+# outermost, so latency covers CORS and every other middleware
+app.add_middleware(metrics.MetricsMiddleware)
+
+background_tasks: list[asyncio.Task] = []
+
 @app.on_event("startup")
 async def on_startup():
-    await init_db()
+    async with profile.step("init_db"):
+        await init_db()
+    async with profile.step("stats"):
+        await stats.ensure_seeded()
+    ingestor.start()
+    if settings.STATS_RECONCILE_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(stats.reconcile_periodically(settings.STATS_RECONCILE_SECONDS)))
+    if settings.ARCHIVE_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(archive.archive_periodically(settings.ARCHIVE_INTERVAL_SECONDS)))
+    profile.log()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    await ingestor.drain()
+    shutdown_hash_pool()
+    await dispose_engines()
 
 @app.exception_handler(IntegrityError)
 async def handle_integrity(_: Request, exc: IntegrityError):
+    if "ux_lead_active_contact" in str(exc.orig):
+        return JSONResponse(status_code=409, content={"detail": "A live lead with the same email and phone already exists"})
     return JSONResponse(status_code=409, content={"detail": "Conflict: duplicate or invalid data"})
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/", tags=["health"])
 async def health():
     return {"status": "ok"}
@@ -49,6 +93,34 @@ async def debug_db():
         "driver": engine.url.get_backend_name() + "+" + engine.url.get_driver_name(),
     }
 
+@app.get("/__debug/auth-cache")
+async def debug_auth_cache():
+    return principal_cache.stats()
+
+@app.get("/__debug/hash-pool")
+async def debug_hash_pool():
+    return hash_pool_stats()
+
+@app.get("/__debug/ingest")
+async def debug_ingest():
+    return ingestor.stats()
+
+@app.get("/__debug/ratelimit")
+async def debug_ratelimit():
+    return {"limiter": limiter.stats(), "load_shedding": shedder.stats()}
+
+@app.get("/__debug/startup")
+async def debug_startup():
+    return profile.report()
+
+@app.get("/__debug/db-pool")
+async def debug_db_pool():
+    return {
+        "split": read_engine is not engine,
+        "writer": engine.pool.status(),
+        "reader": read_engine.pool.status(),
+    }
+
 @app.get("/__debug/ping")
 async def debug_ping(session: AsyncSession = Depends(get_session)):
     result = await session.exec(sa_select(1))
@@ -57,5 +129,9 @@ async def debug_ping(session: AsyncSession = Depends(get_session)):
 app.include_router(auth.router)
 app.include_router(leads.router)       # /api/leads/*
 app.include_router(activities.router)  # /api/leads/{lead_id}/activities/*
+app.include_router(activities.export_router)  # /api/activities/export
 app.include_router(dashboard.router)
+app.include_router(reports.router)      # /api/reports/*
 # (add your other routers back after this works)
+
+profile.imported(_import_started)
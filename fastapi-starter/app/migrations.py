@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Callable
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateTable
+from sqlmodel import SQLModel
+from app import search
+from app.models import CONTACT_KEY, Activity, Lead, SchemaVersion, StatCounter
+
+log = logging.getLogger(__name__)
+
+# Versioned schema upgrades, run by init_db on every boot. A database already at VERSION
+# costs a table check and one SELECT, instead of create_all reflecting every table and
+# index. Otherwise the steps past its version run in order, in one transaction, and the
+# version is bumped; a brand-new database is built by create_all and stamped directly.
+#
+# To change the schema: change the models, then append a step that brings an existing
+# database in line (add the column, backfill, create the index).
+
+def _has_index(conn: Connection, table: str, name: str) -> bool:
+    if conn.dialect.name == "sqlite":
+        # SQLite reflection skips expression indexes such as ux_lead_active_contact
+        return conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).first() is not None
+    return conn.dialect.has_index(conn, table, name)
+
+def _duplicate_contacts(conn: Connection) -> list[tuple[int, int]]:
+    """(duplicate id, kept id) for live leads sharing a normalized contact with an older one."""
+    groups = (
+        select(func.min(Lead.id).label("keep"), *(k.label(f"k{i}") for i, k in enumerate(CONTACT_KEY)))
+        .where(Lead.is_active == True).group_by(*CONTACT_KEY).having(func.count() > 1)
+    ).subquery()
+    return [tuple(r) for r in conn.execute(
+        select(Lead.id, groups.c.keep)
+        .join(groups, (CONTACT_KEY[0] == groups.c.k0) & (CONTACT_KEY[1] == groups.c.k1))
+        .where(Lead.is_active == True, Lead.id != groups.c.keep).order_by(groups.c.keep, Lead.id)
+    ).all()]
+
+def _check_contacts(conn: Connection) -> None:
+    # ux_lead_active_contact can't be built over duplicate live leads, and choosing which
+    # lead survives is not something to do silently at boot
+    if _has_index(conn, "lead", "ux_lead_active_contact"):
+        return
+    pairs = _duplicate_contacts(conn)
+    if pairs:
+        shown = ", ".join(f"{dup} (same contact as {keep})" for dup, keep in pairs[:20])
+        raise RuntimeError(
+            f"{len(pairs)} live leads share a normalized email + phone with an older lead, so "
+            f"ux_lead_active_contact can't be created: {shown}{' ...' if len(pairs) > 20 else ''}. "
+            "Fix them by hand, or run `python -m app.migrations --merge-duplicate-contacts` to move "
+            "their activities onto the oldest lead of each contact and soft-delete the others."
+        )
+
+def merge_duplicate_contacts(conn: Connection) -> int:
+    """Fold each duplicate live lead into the oldest one with its contact: its activities
+    move over and it is soft-deleted. Returns the number of leads merged."""
+    pairs = _duplicate_contacts(conn)
+    if not pairs:
+        return 0
+    from app.stats import aggregate_queries  # app.stats imports app.database, which imports this module
+    # runs before upgrade(): an older database may lack the statcounter and archive
+    # tables the counters are rebuilt from. The lead table exists already, so this
+    # doesn't try ux_lead_active_contact yet.
+    SQLModel.metadata.create_all(conn)
+    conn.execute(
+        update(Activity).where(Activity.lead_id == bindparam("dup")).values(lead_id=bindparam("keep")),
+        [{"dup": dup, "keep": keep} for dup, keep in pairs],
+    )
+    dups, keeps = [dup for dup, _ in pairs], {keep for _, keep in pairs}
+    now = datetime.utcnow()
+    conn.execute(update(Lead).where(Lead.id.in_(dups)).values(is_active=False, activity_count=0, updated_at=now))
+    moved = select(func.count()).select_from(Activity).where(Activity.lead_id == Lead.id).scalar_subquery()
+    conn.execute(update(Lead).where(Lead.id.in_(keeps)).values(activity_count=moved, updated_at=now))
+    # rebuild the dashboard counters from the tables, as stats.reconcile does
+    conn.execute(delete(StatCounter))
+    for query in aggregate_queries().values():
+        conn.execute(insert(StatCounter).from_select(["bucket", "key", "count"], query))
+    log.warning("merged %d duplicate leads into %d kept leads", len(dups), len(keeps))
+    return len(dups)
+
+def _baseline(conn: Connection) -> None:
+    # databases from before schema_version hold whatever subset of today's tables and
+    # indexes their release created
+    SQLModel.metadata.create_all(conn)
+    _check_contacts(conn)
+    # create_all skips tables that already exist, so add indexes declared later explicitly
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            if not _has_index(conn, table.name, index.name):
+                index.create(conn)
+    search.install(conn)
+
+STEPS: list[Callable[[Connection], None]] = [_baseline]
+VERSION = len(STEPS)
+
+def _version(conn: Connection) -> int:
+    if not conn.dialect.has_table(conn, SchemaVersion.__tablename__):
+        return 0
+    return conn.execute(select(SchemaVersion.version)).scalar() or 0
+
+def _lock(conn: Connection) -> None:
+    # workers booting together against one database upgrade it once; the others wait
+    # here and then find it current
+    if conn.dialect.name == "postgresql":
+        conn.exec_driver_sql(f"LOCK TABLE {SchemaVersion.__tablename__} IN EXCLUSIVE MODE")
+    else:
+        conn.execute(update(SchemaVersion).values(version=SchemaVersion.version))  # takes SQLite's write lock
+
+def upgrade(conn: Connection) -> int:
+    """Bring the schema to VERSION; returns the number of steps applied."""
+    version = _version(conn)
+    if version < VERSION:
+        conn.execute(CreateTable(SchemaVersion.__table__, if_not_exists=True))
+        _lock(conn)
+        version = _version(conn)
+    if version > VERSION:
+        raise RuntimeError(f"database schema is v{version}, newer than this build (v{VERSION})")
+    if version == VERSION:
+        search.detect(conn)
+        return 0
+
+    t0 = time.perf_counter()
+    if version == 0 and not conn.dialect.has_table(conn, Lead.__tablename__):
+        SQLModel.metadata.create_all(conn)
+        search.install(conn)
+        applied = 0
+    else:
+        for step in STEPS[version:]:
+            step(conn)
+        search.detect(conn)
+        applied = VERSION - version
+    conn.execute(delete(SchemaVersion))
+    conn.execute(insert(SchemaVersion).values(id=1, version=VERSION, applied_at=datetime.utcnow()))
+    log.info("schema v%d -> v%d (%d steps) in %.0fms", version, VERSION, applied, (time.perf_counter() - t0) * 1000)
+    return applied
+
+async def _main(merge: bool) -> None:
+    from app.database import dispose_engines, engine
+    async with engine.begin() as conn:
+        if merge:
+            print(f"merged {await conn.run_sync(merge_duplicate_contacts)} duplicate leads")
+        applied = await conn.run_sync(upgrade)
+    print(f"schema at v{VERSION} ({applied} steps applied)")
+    await dispose_engines()
+
+if __name__ == "__main__":
+    # python -m app.migrations [--merge-duplicate-contacts]
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--merge-duplicate-contacts", action="store_true", help="see merge_duplicate_contacts()")
+    asyncio.run(_main(parser.parse_args().merge_duplicate_contacts))
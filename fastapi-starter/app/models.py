@@ -1,7 +1,10 @@
 from __future__ import annotations
 from datetime import datetime, date
 from typing import Optional
-from sqlmodel import SQLModel, Field, Column, String, Boolean, Integer, DateTime
+from sqlalchemy import func, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlmodel import SQLModel, Field, Column, String, Boolean, Integer, DateTime, Index
 
 class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -12,7 +15,23 @@ class User(SQLModel, table=True):
     last_name: str
     created_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime, nullable=False))
 
+def _active_only(name: str, *columns: str) -> Index:
+    # partial index over live leads; soft-deleted rows stay out of the hot path
+    return Index(name, *columns, sqlite_where=text("is_active = 1"), postgresql_where=text("is_active"))
+
 class Lead(SQLModel, table=True):
+    __table_args__ = (
+        # keyset pagination: WHERE is_active ORDER BY created_at DESC, id DESC
+        Index("ix_lead_active_created_id", "is_active", "created_at", "id"),
+        # list_leads status / source filters, in list order; status also serves the dashboard group-by
+        _active_only("ix_lead_active_status_created", "status", "created_at", "id"),
+        _active_only("ix_lead_active_source_created", "source", "created_at", "id"),
+        # min_budget / max_budget OR across both columns
+        _active_only("ix_lead_active_budget_min", "budget_min"),
+        _active_only("ix_lead_active_budget_max", "budget_max"),
+        # closed-this-month style ranges over all leads
+        Index("ix_lead_status_created", "status", "created_at"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     first_name: str
     last_name: str
@@ -28,7 +47,42 @@ class Lead(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime, nullable=False))
     activity_count: int = Field(default=0, sa_column=Column(Integer, nullable=False))
 
+class phone_key(FunctionElement):
+    # phone with the separators "- ()+." stripped, the same normalization lead search uses
+    type = String()
+    inherit_cache = True
+
+@compiles(phone_key)
+def _phone_key(element, compiler, **kw):
+    expr = compiler.process(element.clauses, **kw)
+    for ch in "- ()+.":
+        expr = f"replace({expr}, '{ch}', '')"
+    return expr
+
+@compiles(phone_key, "postgresql")
+def _phone_key_pg(element, compiler, **kw):
+    return f"translate({compiler.process(element.clauses, **kw)}, '- ()+.', '')"
+
+def contact_key(email: str, phone: str) -> tuple[str, str]:
+    """Python side of ux_lead_active_contact (exact for ASCII emails)."""
+    return email.lower(), phone.translate(_PHONE_SEPARATORS)
+
+_PHONE_SEPARATORS = str.maketrans("", "", "- ()+.")
+
+# one live lead per normalized contact; bulk/import upserts use it as their ON CONFLICT target
+CONTACT_KEY = (func.lower(Lead.email), phone_key(Lead.phone))
+Index(
+    "ux_lead_active_contact", *CONTACT_KEY, unique=True,
+    sqlite_where=text("is_active = 1"), postgresql_where=text("is_active"),
+)
+
 class Activity(SQLModel, table=True):
+    __table_args__ = (
+        # dashboard recent activities: ORDER BY activity_date DESC, created_at DESC LIMIT n
+        Index("ix_activity_date_created", "activity_date", "created_at"),
+        # per-lead timeline pages: WHERE lead_id = ? [AND activity_date range] ORDER BY activity_date, created_at, id DESC
+        Index("ix_activity_lead_date_created", "lead_id", "activity_date", "created_at", "id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     lead_id: int = Field(foreign_key="lead.id", index=True)
     user_id: int = Field(foreign_key="user.id", index=True)
@@ -39,3 +93,66 @@ class Activity(SQLModel, table=True):
     activity_date: date
     created_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime, nullable=False))
     user_name: str
+
+class StatCounter(SQLModel, table=True):
+    # incrementally maintained dashboard aggregates, see app/stats.py
+    bucket: str = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    count: int = Field(default=0, sa_column=Column(Integer, nullable=False))
+
+class IdempotencyKey(SQLModel, table=True):
+    # stored responses for retried POST /api/leads, see app/idempotency.py
+    user_id: int = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    fingerprint: str
+    status_code: int
+    body: str
+    created_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime, nullable=False, index=True))
+
+class DailyRollup(SQLModel, table=True):
+    # per-day report counters, see app/rollups.py; the primary key order serves
+    # WHERE metric = ? AND day BETWEEN ? AND ?
+    metric: str = Field(primary_key=True)
+    day: date = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    count: int = Field(default=0, sa_column=Column(Integer, nullable=False))
+
+# Cold storage for soft-deleted leads, see app/archive.py. Same columns as the hot
+# tables plus archived_at; no foreign keys, so archived activities can outlive users.
+class LeadArchive(SQLModel, table=True):
+    __tablename__ = "lead_archive"
+    id: int = Field(primary_key=True)
+    first_name: str
+    last_name: str
+    email: str
+    phone: str
+    status: str
+    source: str
+    budget_min: Optional[int] = None
+    budget_max: Optional[int] = None
+    property_interest: Optional[str] = None
+    is_active: bool = Field(default=False, sa_column=Column(Boolean, nullable=False))
+    created_at: datetime = Field(sa_column=Column(DateTime, nullable=False))
+    updated_at: datetime = Field(sa_column=Column(DateTime, nullable=False))
+    activity_count: int = Field(default=0, sa_column=Column(Integer, nullable=False))
+    archived_at: datetime = Field(sa_column=Column(DateTime, nullable=False, index=True))
+
+class ActivityArchive(SQLModel, table=True):
+    __tablename__ = "activity_archive"
+    id: int = Field(primary_key=True)
+    lead_id: int = Field(index=True)
+    user_id: int
+    activity_type: str
+    title: str
+    notes: Optional[str] = None
+    duration: Optional[int] = None
+    activity_date: date
+    created_at: datetime = Field(sa_column=Column(DateTime, nullable=False))
+    user_name: str
+
+class SchemaVersion(SQLModel, table=True):
+    # one row: the migration step the database is at, see app/migrations.py
+    __tablename__ = "schema_version"
+    id: int = Field(default=1, primary_key=True)
+    version: int
+    applied_at: datetime = Field(sa_column=Column(DateTime, nullable=False))
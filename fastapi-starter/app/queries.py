@@ -0,0 +1,111 @@
+from datetime import date, datetime
+from typing import Sequence
+from sqlalchemy import tuple_
+from sqlmodel import func, select
+from app.models import CONTACT_KEY, Activity, DailyRollup, Lead
+from app.schemas import ActivityFilter, ActivityOut, LeadFilter, LeadOut
+from app.search import apply_search
+
+# Statement builders shared by the routers, so every entry point filters leads the same
+# way and bench/query_plans.py can EXPLAIN exactly what the API runs.
+
+LEAD_COLUMNS = list(LeadOut.model_fields)
+ACTIVITY_COLUMNS = list(ActivityOut.model_fields)
+
+def lead_columns(columns: Sequence[str] = LEAD_COLUMNS):
+    return [Lead.__table__.c[c] for c in columns]
+
+def activity_columns(columns: Sequence[str] = ACTIVITY_COLUMNS):
+    return [Activity.__table__.c[c] for c in columns]
+
+def filter_leads(stmt, f: LeadFilter, ranked: bool = False):
+    """Apply list_leads filter semantics to a select that includes Lead.
+
+    Returns `(stmt, relevance)`; `relevance` is an ORDER BY term when `ranked` and `f.q` is set.
+    """
+    stmt = stmt.where(Lead.is_active == True)
+    relevance = None
+    if f.q:
+        stmt, relevance = apply_search(stmt, f.q, ranked=ranked)
+    status_norm = (f.status or "").strip().lower()
+    if status_norm not in ("", "all"):
+        stmt = stmt.where(Lead.status == status_norm)
+    if f.source:
+        stmt = stmt.where(Lead.source == f.source)
+    if f.min_budget is not None:
+        stmt = stmt.where((Lead.budget_min >= f.min_budget) | (Lead.budget_max >= f.min_budget))
+    if f.max_budget is not None:
+        stmt = stmt.where((Lead.budget_max <= f.max_budget) | (Lead.budget_min <= f.max_budget))
+    return stmt, relevance
+
+def lead_list(f: LeadFilter, ranked: bool = False, after: tuple[datetime, int] | None = None):
+    stmt, relevance = filter_leads(select(*lead_columns()), f, ranked=ranked)
+    if after is not None:
+        after_created, after_id = after
+        stmt = stmt.where(
+            (Lead.created_at < after_created) |
+            ((Lead.created_at == after_created) & (Lead.id < after_id))
+        )
+    if relevance is not None:
+        stmt = stmt.order_by(relevance)
+    return stmt.order_by(Lead.created_at.desc(), Lead.id.desc())
+
+def lead_export(f: LeadFilter, columns: Sequence[str] = LEAD_COLUMNS):
+    stmt, _ = filter_leads(select(*lead_columns(columns)), f)
+    return stmt.order_by(Lead.id)
+
+def activity_export(f: LeadFilter, columns: Sequence[str] = ACTIVITY_COLUMNS):
+    stmt = select(*activity_columns(columns)).join(Lead, Lead.id == Activity.lead_id)
+    stmt, _ = filter_leads(stmt, f)
+    return stmt.order_by(Activity.id)
+
+def select_leads(stmt, ids: Sequence[int] | None = None, f: LeadFilter | None = None):
+    """Restrict `stmt` to active leads picked by id, or by list_leads filters."""
+    if ids is not None:
+        return stmt.where(Lead.id.in_(ids), Lead.is_active == True)
+    stmt, _ = filter_leads(stmt, f or LeadFilter())
+    return stmt
+
+def leads_by_email(stmt, emails: Sequence[str]):
+    """Restrict `stmt` to active leads whose normalized email is one of `emails`; a prefix
+    of ux_lead_active_contact, so it is an index probe per email."""
+    return stmt.where(Lead.is_active == True, CONTACT_KEY[0].in_([func.lower(e) for e in emails]))
+
+def lead_by_id(lead_id: int):
+    return select(*lead_columns()).where(Lead.id == lead_id, Lead.is_active == True)
+
+def lead_version(lead_id: int):
+    # inputs of the lead ETag, without loading the row payload
+    return select(Lead.updated_at, Lead.activity_count).where(Lead.id == lead_id, Lead.is_active == True)
+
+def activity_version(lead_id: int):
+    # inputs of the activities ETag; activities are append-only, so count + newest id
+    # identify the set
+    newest = select(func.max(Activity.id)).where(Activity.lead_id == lead_id).scalar_subquery()
+    return select(Lead.activity_count, newest).where(Lead.id == lead_id, Lead.is_active == True)
+
+def activity_timeline(lead_id: int, f: ActivityFilter | None = None, after: tuple[date, datetime, int] | None = None):
+    # newest first, walking ix_activity_lead_date_created backwards; the keyset
+    # (activity_date, created_at, id) makes every page an index range scan
+    stmt = select(*activity_columns()).where(Activity.lead_id == lead_id)
+    if f is not None:
+        if f.date_from is not None:
+            stmt = stmt.where(Activity.activity_date >= f.date_from)
+        if f.date_to is not None:
+            stmt = stmt.where(Activity.activity_date <= f.date_to)
+        if f.activity_type:
+            stmt = stmt.where(Activity.activity_type == f.activity_type)
+    if after is not None:
+        stmt = stmt.where(tuple_(Activity.activity_date, Activity.created_at, Activity.id) < tuple_(*after))
+    return stmt.order_by(Activity.activity_date.desc(), Activity.created_at.desc(), Activity.id.desc())
+
+def recent_activities(limit: int):
+    return select(*activity_columns()).order_by(Activity.activity_date.desc(), Activity.created_at.desc()).limit(limit)
+
+def rollup_range(metric: str, date_from: date, date_to: date):
+    # a primary-key range scan: one row per day and key, however many activities there are
+    return (
+        select(DailyRollup.day, DailyRollup.key, DailyRollup.count)
+        .where(DailyRollup.metric == metric, DailyRollup.day >= date_from, DailyRollup.day <= date_to)
+        .order_by(DailyRollup.day)
+    )
@@ -0,0 +1,79 @@
+import asyncio
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Iterable, Sequence
+from sqlalchemy import String, cast, delete, func, insert, literal, union_all
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import SessionLocal, dispose_engines, init_db
+from app.models import Activity, ActivityArchive, DailyRollup
+from app.stats import add_counts
+
+# Per-day counters for the time-series reports, kept as (metric, day, key) -> count rows
+# in DailyRollup. Write paths add their deltas in the same transaction as the row change,
+# so a report over any range reads at most one row per day and key; weeks are summed
+# from days at read time.
+ACTIVITY_TYPE = "activity_type"      # activities per activity_date + activity_type
+ACTIVITY_USER = "activity_user"      # activities per activity_date + user_id
+LEAD_STATUS = "lead_status"          # leads entering a status per day, by creation or update
+LEAD_TRANSITION = "lead_transition"  # lead status changes per day, key "old>new"
+
+def activity_deltas(rows: Iterable[dict], deltas: Counter | None = None) -> Counter:
+    deltas = deltas if deltas is not None else Counter()
+    for r in rows:
+        deltas[(ACTIVITY_TYPE, r["activity_date"], r["activity_type"])] += 1
+        deltas[(ACTIVITY_USER, r["activity_date"], str(r["user_id"]))] += 1
+    return deltas
+
+def lead_status_deltas(old: str | None, new: str, day: date, deltas: Counter | None = None) -> Counter:
+    """`old` is None for a newly created lead."""
+    deltas = deltas if deltas is not None else Counter()
+    if old != new:
+        deltas[(LEAD_STATUS, day, new)] += 1
+        if old is not None:
+            deltas[(LEAD_TRANSITION, day, f"{old}>{new}")] += 1
+    return deltas
+
+async def apply(session: AsyncSession, deltas: Counter) -> None:
+    rows = [{"metric": m, "day": d, "key": k, "count": n} for (m, d, k), n in deltas.items() if n]
+    await add_counts(session, DailyRollup, ("metric", "day", "key"), rows)
+
+def series(rows: Sequence, interval: str, grouped: bool) -> list[dict]:
+    """Fold (day, key, count) rows into points per period (the day, or the Monday of its week)."""
+    out: Counter = Counter()
+    for day, key, n in rows:
+        period = day - timedelta(days=day.weekday()) if interval == "week" else day
+        out[(period, key if grouped else "all")] += n
+    return [{"period": p, "key": k, "count": n} for (p, k), n in sorted(out.items())]
+
+async def backfill(session: AsyncSession) -> None:
+    """Rebuild the activity rollups from activity + activity_archive.
+
+    Lead status history isn't stored anywhere else, so lead metrics only cover changes
+    made since the rollups were introduced.
+    """
+    await session.exec(delete(DailyRollup).where(DailyRollup.metric.in_([ACTIVITY_TYPE, ACTIVITY_USER])))
+    for metric, column in ((ACTIVITY_TYPE, "activity_type"), (ACTIVITY_USER, "user_id")):
+        every = union_all(
+            select(Activity.activity_date, getattr(Activity, column)),
+            select(ActivityArchive.activity_date, getattr(ActivityArchive, column)),
+        ).subquery()
+        key = cast(every.c[column], String)
+        await session.exec(insert(DailyRollup).from_select(
+            ["metric", "day", "key", "count"],
+            select(literal(metric), every.c.activity_date, key, func.count()).group_by(every.c.activity_date, key),
+        ))
+    await session.commit()
+
+async def _main() -> None:
+    await init_db()
+    t0 = datetime.utcnow()
+    async with SessionLocal() as session:
+        await backfill(session)
+        rows = await session.scalar(select(func.count()).select_from(DailyRollup))
+    print(f"activity rollups rebuilt: {rows} rows in {(datetime.utcnow() - t0).total_seconds():.1f}s")
+    await dispose_engines()
+
+if __name__ == "__main__":
+    # python -m app.rollups
+    asyncio.run(_main())
@@ -1,72 +1,107 @@
-from typing import List, Union, Annotated
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from sqlmodel import select
+from datetime import date, datetime
+from typing import List, Optional, Union, Annotated
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, Body
 from sqlmodel.ext.asyncio.session import AsyncSession
-from app.core.deps import get_current_user
-from app.database import get_session
-from app.models import Activity, Lead, User
-from app.schemas import ActivityCreate, ActivityOut
+from app.bulk import insert_activities
+from app.core.config import settings
+from app.core.cursor import decode_cursor, encode_cursor
+from app.core.deps import activity_filters, get_current_user, lead_filters
+from app.core.etag import etag_headers, make_etag, not_modified
+from app.core.serialization import FastJSONResponse, row_dicts
+from app.database import get_read_session, get_write_session
+from app.export import export_response
+from app.ingest import ingestor
+from app.models import User
+from app.queries import ACTIVITY_COLUMNS, activity_export, activity_timeline, activity_version
+from app.schemas import ActivityCreate, ActivityFilter, ActivityIngestStatus, ActivityOut, ActivityPage, LeadFilter
 
 router = APIRouter(prefix="/api/leads/{lead_id}/activities", tags=["activities"])
+export_router = APIRouter(prefix="/api/activities", tags=["activities"])
 
-async def _get_lead_or_404(lead_id: int, session: AsyncSession) -> Lead:
-    lead = await session.get(Lead, lead_id)
-    if not lead or not lead.is_active:
+@router.get("", response_model=Union[List[ActivityOut], ActivityPage], responses={304: {"description": "Not modified (If-None-Match)"}})
+@router.get("/", response_model=Union[List[ActivityOut], ActivityPage], include_in_schema=False)
+async def list_activities(
+    lead_id: int,
+    request: Request,
+    filters: Annotated[ActivityFilter, Depends(activity_filters)],
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+    _: Annotated[User, Depends(get_current_user)],
+    size: int = Query(settings.ACTIVITY_PAGE_SIZE, ge=1, le=settings.ACTIVITY_PAGE_MAX),
+    cursor: Optional[str] = Query(None, description="keyset cursor; pass empty to start, then next_cursor"),
+):
+    # the version lookup doubles as the 404 check and answers polls without loading rows
+    version = (await session.exec(activity_version(lead_id))).first()
+    if version is None:
         raise HTTPException(status_code=404, detail="Lead not found")
-    return lead
+    etag = make_etag("activities", lead_id, *version)
+    if not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+
+    after = decode_cursor(cursor, (date, datetime, int)) if cursor else None
+    rows = (await session.exec(activity_timeline(lead_id, filters, after).limit(size))).all()
+    items = row_dicts(rows, ACTIVITY_COLUMNS)
 
-@router.get("")
-@router.get("/")
-async def list_activities(lead_id: int, session: Annotated[AsyncSession, Depends(get_session)], _: Annotated[User, Depends(get_current_user)]) -> List[ActivityOut]:
-    await _get_lead_or_404(lead_id, session)
-    rows = (await session.exec(
-        select(Activity).where(Activity.lead_id == lead_id).order_by(Activity.activity_date.desc(), Activity.created_at.desc())
-    )).all()
-    return [ActivityOut.model_validate(r.__dict__) for r in rows]
+    headers = etag_headers(etag)
+    last = items[-1] if len(items) == size else None
+    next_cursor = encode_cursor((last["activity_date"], last["created_at"], last["id"])) if last else None
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    # plain callers keep getting a bare list (first page); cursor callers get the envelope
+    if cursor is None:
+        return FastJSONResponse(items, headers=headers)
+    return FastJSONResponse({"items": items, "next_cursor": next_cursor}, headers=headers)
 
-@router.post("", response_model=Union[ActivityOut, List[ActivityOut]], status_code=status.HTTP_201_CREATED)
+ASYNC_RESPONSES = {202: {"model": ActivityIngestStatus, "description": "Queued (`Prefer: respond-async`)"}}
+
+@router.post("", response_model=Union[ActivityOut, List[ActivityOut]], status_code=status.HTTP_201_CREATED, responses=ASYNC_RESPONSES)
 @router.post("/", response_model=Union[ActivityOut, List[ActivityOut]], status_code=status.HTTP_201_CREATED, include_in_schema=False)
 async def add_activities(
     lead_id: int,
+    request: Request,
     payload: Annotated[Union[ActivityCreate, List[ActivityCreate]], Body(..., description="Single object or array.")],
-    session: Annotated[AsyncSession, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_write_session)],
     current_user: Annotated[User, Depends(get_current_user)],
 ):
-    lead = await _get_lead_or_404(lead_id, session)
+    if isinstance(payload, list) and not payload:
+        raise HTTPException(status_code=400, detail="Empty list provided")
+
+    if "respond-async" in request.headers.get("prefer", ""):
+        ticket = await ingestor.submit(lead_id, current_user, payload if isinstance(payload, list) else [payload])
+        return FastJSONResponse(
+            ticket.model_dump(),
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={"Location": f"/api/activities/ingest/{ticket.ticket}", "Preference-Applied": "respond-async"},
+        )
 
     if isinstance(payload, list):
-        if not payload:
-            raise HTTPException(status_code=400, detail="Empty list provided")
-        activities = [
-            Activity(
-                lead_id=lead.id,
-                user_id=current_user.id,
-                user_name=f"{current_user.first_name} {current_user.last_name}",
-                **p.model_dump(),
-            )
-            for p in payload
-        ]
-        session.add_all(activities)
-        lead.activity_count += len(activities)
-        session.add(lead)
         try:
+            out = await insert_activities(session, lead_id, current_user, payload)
             await session.commit()
+        except HTTPException:
+            await session.rollback()
+            raise
         except Exception as e:
             await session.rollback()
             raise HTTPException(status_code=400, detail=f"Bulk insert failed: {e}")
-        for a in activities:
-            await session.refresh(a)
-        return [ActivityOut.model_validate(a.__dict__) for a in activities]
+        return out
 
-    activity = Activity(
-        lead_id=lead.id,
-        user_id=current_user.id,
-        user_name=f"{current_user.first_name} {current_user.last_name}",
-        **payload.model_dump(),
-    )
-    session.add(activity)
-    lead.activity_count += 1
-    session.add(lead)
+    out = await insert_activities(session, lead_id, current_user, [payload])
     await session.commit()
-    await session.refresh(activity)
-    return ActivityOut.model_validate(activity.__dict__)
\ No newline at end of file
+    return out[0]
+
+@export_router.get("/export", summary="Stream activities of all matching leads as CSV or NDJSON")
+async def export_activities(
+    filters: Annotated[LeadFilter, Depends(lead_filters)],
+    _: Annotated[User, Depends(get_current_user)],
+    fmt: str = Query("csv", alias="format", description="csv or ndjson"),
+    gzip: bool = False,
+):
+    # filters select the parent leads, with the same semantics as GET /api/leads
+    return export_response(activity_export(filters), ACTIVITY_COLUMNS, fmt, gzip, "activities")
+
+@export_router.get("/ingest/{ticket}", response_model=ActivityIngestStatus, summary="Status of an async activity ingest ticket")
+async def ingest_status(ticket: str, current_user: Annotated[User, Depends(get_current_user)]):
+    found = ingestor.lookup(ticket, current_user.id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    return found
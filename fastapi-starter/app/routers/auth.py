@@ -2,22 +2,34 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy import update
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.auth_cache import principal_cache
 from app.core.deps import get_current_user
+from app.core.ratelimit import limit_by_client_ip
 from app.core.security import hash_password, verify_password, create_access_token, needs_rehash
-from app.database import get_session
+from app.database import SessionLocal, get_read_session, get_write_session
 from app.models import User
 from app.schemas import UserCreate, UserLogin, UserOut, Token
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
-@router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
-async def register(user_in: UserCreate, session: Annotated[AsyncSession, Depends(get_session)]):
+async def _rehash_if_needed(user: User, password: str) -> None:
+    # the lookup ran on the read pool; only an actual rehash takes the writer
+    if not needs_rehash(user.password_hash):
+        return
+    password_hash = await hash_password(password)
+    async with SessionLocal() as session, session.begin():
+        await session.exec(update(User).where(User.id == user.id).values(password_hash=password_hash))
+    principal_cache.invalidate(user.username)
+
+@router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED, dependencies=[Depends(limit_by_client_ip)])
+async def register(user_in: UserCreate, session: Annotated[AsyncSession, Depends(get_write_session)]):
     user = User(
         username=user_in.username,
         email=user_in.email,
-        password_hash=hash_password(user_in.password),
+        password_hash=await hash_password(user_in.password),
         first_name=user_in.first_name,
         last_name=user_in.last_name,
     )
@@ -30,31 +42,25 @@ async def register(user_in: UserCreate, session: Annotated[AsyncSession, Depends
     await session.refresh(user)
     return UserOut.model_validate(user.__dict__)
 
-@router.post("/token", response_model=Token)
+@router.post("/token", response_model=Token, dependencies=[Depends(limit_by_client_ip)])
 async def login_token(
     form: Annotated[OAuth2PasswordRequestForm, Depends()],
-    session: Annotated[AsyncSession, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_read_session)],
 ):
     result = await session.exec(select(User).where(User.username == form.username))
     user = result.first()
-    if not user or not verify_password(form.password, user.password_hash):
+    if not user or not await verify_password(form.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid username or password")
-    if needs_rehash(user.password_hash):
-        user.password_hash = hash_password(form.password)
-        async with session.begin():
-            session.add(user)
+    await _rehash_if_needed(user, form.password)
     return Token(access_token=create_access_token(subject=user.username))
 
-@router.post("/login", response_model=Token)
-async def login(credentials: UserLogin, session: Annotated[AsyncSession, Depends(get_session)]):
+@router.post("/login", response_model=Token, dependencies=[Depends(limit_by_client_ip)])
+async def login(credentials: UserLogin, session: Annotated[AsyncSession, Depends(get_read_session)]):
     result = await session.exec(select(User).where(User.username == credentials.username))
     user = result.first()
-    if not user or not verify_password(credentials.password, user.password_hash):
+    if not user or not await verify_password(credentials.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid username or password")
-    if needs_rehash(user.password_hash):
-        user.password_hash = hash_password(credentials.password)
-        async with session.begin():
-            session.add(user)
+    await _rehash_if_needed(user, credentials.password)
     return Token(access_token=create_access_token(subject=user.username))
 
 @router.get("/me", response_model=UserOut)
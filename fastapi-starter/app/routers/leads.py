@@ -1,48 +1,57 @@
 from typing import List, Optional, Union, Annotated
+from collections import Counter
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query, status, Body
-from sqlmodel import select, col
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, Body
+from pydantic import ValidationError
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from app.core.deps import get_current_user
-from app.database import get_session
-from app.models import Lead, User
-from app.schemas import LeadCreate, LeadOut, LeadUpdate
+from app import idempotency, rollups, stats
+from app.archive import restore_lead
+from app.bulk import insert_leads, iter_lines, iter_records, update_leads, upsert_leads
+from app.core.config import settings
+from app.core.cursor import decode_cursor, encode_cursor
+from app.core.deps import get_current_user, lead_filters
+from app.core.etag import check_if_match, etag_headers, make_etag, not_modified
+from app.core.serialization import FastJSONResponse, row_dicts
+from app.database import get_read_session, get_write_session
+from app.models import Lead, User, contact_key
+from app.export import export_response
+from app.queries import LEAD_COLUMNS, lead_by_id, lead_columns, lead_export, lead_list, lead_version, select_leads
+from app.schemas import (
+    LeadBatchGet, LeadBatchItem, LeadBatchResult, LeadBatchUpdate, LeadCreate, LeadFilter, LeadImportError,
+    LeadImportResult, LeadOut, LeadPage, LeadSelection, LeadUpdate,
+)
 
 router = APIRouter(prefix="/api/leads", tags=["leads"])
 
-@router.get("", response_model=List[LeadOut])
+@router.get("", response_model=Union[List[LeadOut], LeadPage])
 async def list_leads(
-    q: Optional[str] = Query(None, description="search in name/email/phone"),
-    status_f: Optional[str] = Query(None, alias="status"),
-    source: Optional[str] = None,
-    min_budget: Optional[int] = None,
-    max_budget: Optional[int] = None,
-    page: int = 1,
-    size: int = 10,
-    session: Annotated[AsyncSession, Depends(get_session)] = None,
+    filters: Annotated[LeadFilter, Depends(lead_filters)],
+    page: int = Query(1, ge=1),
+    size: int = Query(10, ge=1, le=settings.LEAD_PAGE_MAX),
+    cursor: Optional[str] = Query(None, description="keyset cursor; pass empty to start, then next_cursor"),
+    session: Annotated[AsyncSession, Depends(get_read_session)] = None,
     _: Annotated[User, Depends(get_current_user)] = None,
 ):
-    stmt = select(Lead).where(Lead.is_active == True)
-    if q:
-        like = f"%{q}%"
-        stmt = stmt.where(
-            (col(Lead.first_name).ilike(like)) |
-            (col(Lead.last_name).ilike(like))  |
-            (col(Lead.email).ilike(like))      |
-            (col(Lead.phone).ilike(like))
-        )
-    status_norm = (status_f or "").strip().lower()
-    if status_norm not in ("", "all"):
-            stmt = stmt.where(Lead.status == status_norm)
-    if source:   stmt = stmt.where(Lead.source == source)
-    if min_budget is not None:
-        stmt = stmt.where((Lead.budget_min >= min_budget) | (Lead.budget_max >= min_budget))
-    if max_budget is not None:
-        stmt = stmt.where((Lead.budget_max <= max_budget) | (Lead.budget_min <= max_budget))
-
-    stmt = stmt.order_by(Lead.created_at.desc()).offset((page - 1) * size).limit(size)
-    leads = (await session.exec(stmt)).all()
-    return [LeadOut.model_validate(l.__dict__) for l in leads]
+    # keyset cursors need a stable (created_at, id) order, so only page mode ranks, and a
+    # ranked page has no (created_at, id) position to continue from
+    ranked = cursor is None and bool(filters.q)
+    after = decode_cursor(cursor, (datetime, int)) if cursor else None
+    stmt = lead_list(filters, ranked=ranked, after=after)
+    if cursor is None:
+        stmt = stmt.offset((page - 1) * size)
+    items = row_dicts((await session.exec(stmt.limit(size))).all(), LEAD_COLUMNS)
+
+    headers = {}
+    next_cursor = None
+    if len(items) == size and not ranked:
+        next_cursor = encode_cursor((items[-1]["created_at"], items[-1]["id"]))
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    # page/size callers keep getting a bare list; cursor callers get the envelope
+    if cursor is None:
+        return FastJSONResponse(items, headers=headers)
+    return FastJSONResponse({"items": items, "next_cursor": next_cursor}, headers=headers)
 
 @router.post(
     "",
@@ -55,56 +64,226 @@ async def create_leads(
         Union[LeadCreate, List[LeadCreate]],
         Body(..., description="Accepts a single lead object or an array of lead objects.")
     ],
-    session: Annotated[AsyncSession, Depends(get_session)],
-    _: Annotated[User, Depends(get_current_user)],
+    request: Request,
+    session: Annotated[AsyncSession, Depends(get_write_session)],
+    user: Annotated[User, Depends(get_current_user)],
+    upsert: bool = Query(False, description="merge into live leads with the same normalized email + phone"),
 ):
+    key = request.headers.get(idempotency.HEADER)
+    params = {"upsert": upsert}
+    if key:
+        replayed = await idempotency.replay(session, user.id, key, payload, params)
+        if replayed is not None:
+            return replayed
+
+    async def respond(result):
+        # with a key, the response is stored in the same transaction as the leads
+        if not key:
+            await session.commit()
+            return result
+        body = await idempotency.remember(session, user.id, key, payload, params, status.HTTP_201_CREATED, result)
+        await session.commit()
+        return Response(content=body, status_code=status.HTTP_201_CREATED, media_type="application/json")
+
     if isinstance(payload, list):
         if not payload:
             raise HTTPException(status_code=400, detail="Empty list provided")
-        leads = [Lead(**p.model_dump()) for p in payload]
-        session.add_all(leads)
         try:
-            await session.commit()
+            leads = (await upsert_leads(session, payload))[0] if upsert else await insert_leads(session, payload)
+            return await respond(leads)
         except Exception as e:
             await session.rollback()
             raise HTTPException(status_code=400, detail=f"Bulk insert failed: {e}")
-        for l in leads:
-            await session.refresh(l)
-        return [LeadOut.model_validate(l.__dict__) for l in leads]
 
+    if upsert:
+        leads, _ = await upsert_leads(session, [payload])
+        return await respond(leads[0])
     lead = Lead(**payload.model_dump())
     session.add(lead)
+    await stats.apply(session, stats.lead_deltas(stats.LeadState.of(lead)))
+    await rollups.apply(session, rollups.lead_status_deltas(None, lead.status, lead.created_at.date()))
+    if key:
+        await session.flush()
+        return await respond(LeadOut.model_validate(lead.__dict__))
     await session.commit()
     await session.refresh(lead)
     return LeadOut.model_validate(lead.__dict__)
 
-@router.get("/{lead_id}", response_model=LeadOut)
-async def get_lead(lead_id: int, session: Annotated[AsyncSession, Depends(get_session)], _: Annotated[User, Depends(get_current_user)]):
-    lead = await session.get(Lead, lead_id)
-    if not lead or not lead.is_active:
+@router.post("/import", response_model=LeadImportResult, summary="Stream-import leads from NDJSON or CSV")
+async def import_leads(
+    request: Request,
+    session: Annotated[AsyncSession, Depends(get_write_session)],
+    _: Annotated[User, Depends(get_current_user)],
+    fmt: Optional[str] = Query(None, alias="format", description="ndjson or csv; defaults from Content-Type"),
+    batch_size: int = Query(settings.IMPORT_BATCH_SIZE, ge=1, le=10_000),
+    upsert: bool = Query(False, description="merge into live leads with the same normalized email + phone"),
+):
+    fmt = (fmt or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")).lower()
+    if fmt not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+
+    inserted = updated = failed = batches = 0
+    errors: List[LeadImportError] = []
+    pending: List[tuple[int, LeadCreate]] = []
+
+    def record_error(row: int, detail) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < settings.IMPORT_MAX_ERRORS:
+            errors.append(LeadImportError(row=row, detail=detail))
+
+    async def flush() -> None:
+        nonlocal inserted, updated, batches
+        if not pending:
+            return
+        try:
+            if upsert:
+                leads, created = await upsert_leads(session, [p for _, p in pending])
+                await session.commit()
+                inserted += created
+                updated += len(leads) - created
+            else:
+                # duplicates are skipped by the statement and reported per row below
+                leads = await insert_leads(session, [p for _, p in pending], skip_duplicates=True)
+                await session.commit()
+                created = Counter(contact_key(lead.email, lead.phone) for lead in leads)
+                for row, p in pending:
+                    key = contact_key(p.email, p.phone)
+                    if created[key]:
+                        created[key] -= 1
+                        inserted += 1
+                    else:
+                        record_error(row, "Duplicate contact: a live lead with the same email and phone already exists")
+            batches += 1
+        except Exception as e:
+            await session.rollback()
+            for row, _ in pending:
+                record_error(row, f"Batch insert failed: {e}")
+        pending.clear()
+
+    async for row, record in iter_records(iter_lines(request.stream()), fmt):
+        if isinstance(record, Exception):
+            record_error(row, str(record))
+            continue
+        try:
+            pending.append((row, LeadCreate.model_validate(record)))
+        except ValidationError as e:
+            record_error(row, e.errors(include_url=False, include_context=False))
+            continue
+        if len(pending) >= batch_size:
+            await flush()
+    await flush()
+    return LeadImportResult(inserted=inserted, updated=updated, failed=failed, batches=batches, errors=errors)
+
+@router.get("/export", summary="Stream all matching leads as CSV or NDJSON")
+async def export_leads(
+    filters: Annotated[LeadFilter, Depends(lead_filters)],
+    _: Annotated[User, Depends(get_current_user)],
+    fmt: str = Query("csv", alias="format", description="csv or ndjson"),
+    gzip: bool = False,
+):
+    return export_response(lead_export(filters), LEAD_COLUMNS, fmt, gzip, "leads")
+
+def _selected_ids(body: LeadSelection) -> Optional[List[int]]:
+    if (body.ids is None) == (body.filter is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of ids or filter")
+    if body.ids is None:
+        return None
+    if len(body.ids) > settings.LEAD_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {settings.LEAD_BATCH_MAX} ids per call")
+    return list(dict.fromkeys(body.ids))
+
+def _batch_result(requested: Optional[List[int]], done: List[int], result: str) -> LeadBatchResult:
+    done_set = set(done)
+    return LeadBatchResult(matched=len(done), results=[
+        LeadBatchItem(id=i, result=result if i in done_set else "not_found") for i in (requested if requested is not None else done)
+    ])
+
+@router.post("/batch-get", response_model=LeadBatchGet, summary="Fetch many leads by id or filter")
+async def batch_get_leads(body: LeadSelection, session: Annotated[AsyncSession, Depends(get_read_session)], _: Annotated[User, Depends(get_current_user)]):
+    ids = _selected_ids(body)
+    stmt = select_leads(select(*lead_columns()), ids) if ids is not None else lead_list(body.filter)
+    rows = (await session.exec(stmt.limit(settings.LEAD_BATCH_MAX + 1))).all()
+    if len(rows) > settings.LEAD_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Selection matches more than {settings.LEAD_BATCH_MAX} leads")
+    items = row_dicts(rows, LEAD_COLUMNS)
+    missing = []
+    if ids is not None:
+        by_id = {item["id"]: item for item in items}
+        items = [by_id[i] for i in ids if i in by_id]
+        missing = [i for i in ids if i not in by_id]
+    return FastJSONResponse({"items": items, "missing": missing})
+
+@router.post("/batch-update", response_model=LeadBatchResult, summary="Apply the same changes to many leads")
+async def batch_update_leads(body: LeadBatchUpdate, session: Annotated[AsyncSession, Depends(get_write_session)], _: Annotated[User, Depends(get_current_user)]):
+    ids = _selected_ids(body)
+    values = body.changes.model_dump(exclude_unset=True)
+    if not values:
+        raise HTTPException(status_code=400, detail="No changes provided")
+    done = await update_leads(session, ids, body.filter, values)
+    await session.commit()
+    return _batch_result(ids, done, "updated")
+
+@router.post("/batch-delete", response_model=LeadBatchResult, summary="Soft-delete many leads")
+async def batch_delete_leads(body: LeadSelection, session: Annotated[AsyncSession, Depends(get_write_session)], _: Annotated[User, Depends(get_current_user)]):
+    ids = _selected_ids(body)
+    done = await update_leads(session, ids, body.filter, {"is_active": False})
+    await session.commit()
+    return _batch_result(ids, done, "deleted")
+
+def _lead_etag(lead_id: int, updated_at: datetime, activity_count: int) -> str:
+    return make_etag("lead", lead_id, updated_at, activity_count)
+
+@router.get("/{lead_id}", response_model=LeadOut, responses={304: {"description": "Not modified (If-None-Match)"}})
+async def get_lead(lead_id: int, request: Request, session: Annotated[AsyncSession, Depends(get_read_session)], _: Annotated[User, Depends(get_current_user)]):
+    if request.headers.get("if-none-match"):
+        version = (await session.exec(lead_version(lead_id))).first()
+        if version is None:
+            raise HTTPException(status_code=404, detail="Lead not found")
+        etag = _lead_etag(lead_id, *version)
+        if not_modified(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+    row = (await session.exec(lead_by_id(lead_id))).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Lead not found")
-    return LeadOut.model_validate(lead.__dict__)
+    item = dict(zip(LEAD_COLUMNS, row))
+    return FastJSONResponse(item, headers=etag_headers(_lead_etag(lead_id, item["updated_at"], item["activity_count"])))
 
-@router.put("/{lead_id}", response_model=LeadOut)
-async def update_lead(lead_id: int, payload: LeadUpdate, session: Annotated[AsyncSession, Depends(get_session)], _: Annotated[User, Depends(get_current_user)]):
-    lead = await session.get(Lead, lead_id)
+@router.put("/{lead_id}", response_model=LeadOut, responses={412: {"description": "If-Match does not match the current ETag"}})
+async def update_lead(lead_id: int, payload: LeadUpdate, request: Request, response: Response, session: Annotated[AsyncSession, Depends(get_write_session)], _: Annotated[User, Depends(get_current_user)]):
+    lead = await session.get(Lead, lead_id, with_for_update=bool(request.headers.get("if-match")))
     if not lead or not lead.is_active:
         raise HTTPException(status_code=404, detail="Lead not found")
+    check_if_match(request, _lead_etag(lead.id, lead.updated_at, lead.activity_count))
+    before = stats.LeadState.of(lead)
     updates = payload.model_dump(exclude_unset=True)
     for k, v in updates.items():
         setattr(lead, k, v)
     lead.updated_at = datetime.utcnow()
     session.add(lead)
+    await stats.apply(session, stats.lead_transition(before, stats.LeadState.of(lead)))
+    await rollups.apply(session, rollups.lead_status_deltas(before.status, lead.status, lead.updated_at.date()))
     await session.commit()
     await session.refresh(lead)
+    response.headers.update(etag_headers(_lead_etag(lead.id, lead.updated_at, lead.activity_count)))
     return LeadOut.model_validate(lead.__dict__)
 
-@router.delete("/{lead_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_lead(lead_id: int, session: Annotated[AsyncSession, Depends(get_session)], _: Annotated[User, Depends(get_current_user)]):
-    lead = await session.get(Lead, lead_id)
+@router.delete("/{lead_id}", status_code=status.HTTP_204_NO_CONTENT, responses={412: {"description": "If-Match does not match the current ETag"}})
+async def delete_lead(lead_id: int, request: Request, session: Annotated[AsyncSession, Depends(get_write_session)], _: Annotated[User, Depends(get_current_user)]):
+    lead = await session.get(Lead, lead_id, with_for_update=bool(request.headers.get("if-match")))
     if not lead or not lead.is_active:
         raise HTTPException(status_code=404, detail="Lead not found")
+    check_if_match(request, _lead_etag(lead.id, lead.updated_at, lead.activity_count))
+    before = stats.LeadState.of(lead)
     lead.is_active = False
+    lead.updated_at = datetime.utcnow()  # starts the ARCHIVE_AFTER_DAYS clock
     session.add(lead)
+    await stats.apply(session, stats.lead_transition(before, stats.LeadState.of(lead)))
     await session.commit()
     return None
+
+@router.post("/{lead_id}/restore", response_model=LeadOut, responses={409: {"description": "Lead is not deleted"}})
+async def restore(lead_id: int, response: Response, session: Annotated[AsyncSession, Depends(get_write_session)], _: Annotated[User, Depends(get_current_user)]):
+    lead = await restore_lead(session, lead_id)
+    response.headers.update(etag_headers(_lead_etag(lead.id, lead.updated_at, lead.activity_count)))
+    return LeadOut.model_validate(lead.__dict__)
@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+from typing import Annotated, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app import rollups
+from app.core.config import settings
+from app.core.deps import get_current_user
+from app.core.serialization import FastJSONResponse
+from app.database import get_read_session
+from app.models import User
+from app.queries import rollup_range
+from app.schemas import Timeseries
+
+router = APIRouter(prefix="/api/reports", tags=["reports"])
+
+# Both reports read only the DailyRollup counters (app/rollups.py), never the
+# activity or lead tables.
+
+async def _timeseries(session: AsyncSession, metric: str, date_from: Optional[date], date_to: Optional[date], interval: str, group_by: str, grouped: bool):
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=settings.REPORT_DEFAULT_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="from must be on or before to")
+    if (date_to - date_from).days >= settings.REPORT_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {settings.REPORT_MAX_DAYS} days")
+    rows = (await session.exec(rollup_range(metric, date_from, date_to))).all()
+    return FastJSONResponse({
+        "start": date_from, "end": date_to, "interval": interval, "group_by": group_by,
+        "points": rollups.series(rows, interval, grouped),
+    })
+
+@router.get("/activity-timeseries", response_model=Timeseries, summary="Activity volume per day or week")
+async def activity_timeseries(
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+    _: Annotated[User, Depends(get_current_user)],
+    date_from: Optional[date] = Query(None, alias="from", description=f"activity_date on or after; default {settings.REPORT_DEFAULT_DAYS} days before `to`"),
+    date_to: Optional[date] = Query(None, alias="to", description="activity_date on or before; default today"),
+    interval: Literal["day", "week"] = "day",
+    group_by: Literal["none", "activity_type", "user_id"] = "none",
+):
+    # every activity is counted once per dimension, so the type rollup also gives the totals
+    metric = rollups.ACTIVITY_USER if group_by == "user_id" else rollups.ACTIVITY_TYPE
+    return await _timeseries(session, metric, date_from, date_to, interval, group_by, grouped=group_by != "none")
+
+@router.get("/lead-transitions", response_model=Timeseries, summary="Lead status changes per day or week")
+async def lead_transitions(
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+    _: Annotated[User, Depends(get_current_user)],
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    interval: Literal["day", "week"] = "day",
+    group_by: Literal["status", "transition"] = "status",
+):
+    # "status": leads entering each status (created or changed into it); "transition": "old>new" pairs
+    metric = rollups.LEAD_STATUS if group_by == "status" else rollups.LEAD_TRANSITION
+    return await _timeseries(session, metric, date_from, date_to, interval, group_by, grouped=True)
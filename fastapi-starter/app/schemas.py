@@ -1,5 +1,5 @@
 from datetime import datetime, date
-from typing import Optional, Any, List
+from typing import Optional, Any, List, Literal
 from pydantic import BaseModel, Field
 
 class Token(BaseModel):
@@ -52,6 +52,28 @@ class LeadOut(BaseModel):
     updated_at: datetime
     activity_count: int = 0
 
+class LeadFilter(BaseModel):
+    q: Optional[str] = Field(None, description="search in name/email/phone")
+    status: Optional[str] = Field(None, description='"" or "all" for every status')
+    source: Optional[str] = None
+    min_budget: Optional[int] = None
+    max_budget: Optional[int] = None
+
+class LeadPage(BaseModel):
+    items: List[LeadOut]
+    next_cursor: Optional[str] = None
+
+class LeadImportError(BaseModel):
+    row: int
+    detail: Any
+
+class LeadImportResult(BaseModel):
+    inserted: int
+    updated: int = 0
+    failed: int
+    batches: int
+    errors: List[LeadImportError]
+
 class LeadUpdate(BaseModel):
     first_name: Optional[str] = None
     last_name: Optional[str] = None
@@ -64,6 +86,25 @@ class LeadUpdate(BaseModel):
     property_interest: Optional[str] = None
     is_active: Optional[bool] = None
 
+class LeadSelection(BaseModel):
+    ids: Optional[List[int]] = Field(None, description="explicit lead ids")
+    filter: Optional[LeadFilter] = Field(None, description="or every lead list_leads would return for this filter")
+
+class LeadBatchUpdate(LeadSelection):
+    changes: LeadUpdate
+
+class LeadBatchItem(BaseModel):
+    id: int
+    result: str  # "updated" | "deleted" | "not_found"
+
+class LeadBatchResult(BaseModel):
+    matched: int
+    results: List[LeadBatchItem]
+
+class LeadBatchGet(BaseModel):
+    items: List[LeadOut]
+    missing: List[int]
+
 class ActivityCreate(BaseModel):
     activity_type: str
     title: str
@@ -83,6 +124,35 @@ class ActivityOut(BaseModel):
     created_at: datetime
     user_name: str
 
+class ActivityFilter(BaseModel):
+    date_from: Optional[date] = Field(None, description="activity_date >= from")
+    date_to: Optional[date] = Field(None, description="activity_date <= to")
+    activity_type: Optional[str] = None
+
+class ActivityPage(BaseModel):
+    items: List[ActivityOut]
+    next_cursor: Optional[str] = None
+
+class ActivityIngestStatus(BaseModel):
+    ticket: str
+    status: str  # queued | committed | failed
+    lead_id: int
+    queued: int
+    activity_ids: Optional[List[int]] = None
+    detail: Optional[str] = None
+
+class TimeseriesPoint(BaseModel):
+    period: date  # the day, or the Monday starting the week
+    key: str
+    count: int
+
+class Timeseries(BaseModel):
+    start: date
+    end: date
+    interval: Literal["day", "week"]
+    group_by: str
+    points: List[TimeseriesPoint]
+
 class DashboardStats(BaseModel):
     total_leads: int
     new_leads_this_week: int
@@ -0,0 +1,144 @@
+import logging
+import re
+from sqlalchemy import and_, column, func, literal_column, or_, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from sqlmodel import col
+from app.models import Lead
+
+log = logging.getLogger(__name__)
+
+# Lead search index used transparently by list_leads' `q`.
+#   sqlite:   FTS5 trigram table `lead_fts`, kept in sync by triggers on `lead`
+#   postgres: pg_trgm GIN expression indexes, maintained by the planner itself
+# Anything else (or an SQLite build without FTS5 trigram) falls back to ILIKE.
+
+MIN_TERM = 3  # trigram indexes can't answer shorter substrings
+
+_SQLITE_DIGITS = "replace(replace(replace(replace(replace(replace({0}, '-', ''), ' ', ''), '(', ''), ')', ''), '+', ''), '.', '')"
+
+_SQLITE_FTS_COLUMNS = "rowid, first_name, last_name, email, phone, phone_digits"
+_SQLITE_FTS_VALUES = "{0}.id, {0}.first_name, {0}.last_name, {0}.email, {0}.phone, " + _SQLITE_DIGITS.format("{0}.phone")
+
+_SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE lead_fts USING fts5(first_name, last_name, email, phone, phone_digits, tokenize='trigram')",
+    f"""CREATE TRIGGER lead_fts_ai AFTER INSERT ON lead WHEN new.is_active BEGIN
+        INSERT INTO lead_fts({_SQLITE_FTS_COLUMNS}) VALUES ({_SQLITE_FTS_VALUES.format('new')});
+    END""",
+    f"""CREATE TRIGGER lead_fts_au AFTER UPDATE OF first_name, last_name, email, phone, is_active ON lead BEGIN
+        DELETE FROM lead_fts WHERE rowid = old.id;
+        INSERT INTO lead_fts({_SQLITE_FTS_COLUMNS}) SELECT {_SQLITE_FTS_VALUES.format('new')} WHERE new.is_active;
+    END""",
+    """CREATE TRIGGER lead_fts_ad AFTER DELETE ON lead BEGIN
+        DELETE FROM lead_fts WHERE rowid = old.id;
+    END""",
+    f"INSERT INTO lead_fts({_SQLITE_FTS_COLUMNS}) SELECT {_SQLITE_FTS_VALUES.format('lead')} FROM lead WHERE lead.is_active",
+]
+
+_PG_DOC = "(lead.first_name || ' ' || lead.last_name || ' ' || lead.email || ' ' || lead.phone)"
+_PG_DIGITS = "regexp_replace(lead.phone, '\\D', '', 'g')"
+
+_PG_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_lead_search_trgm ON lead USING gin ({_PG_DOC} gin_trgm_ops) WHERE is_active",
+    f"CREATE INDEX IF NOT EXISTS ix_lead_phone_digits_trgm ON lead USING gin (({_PG_DIGITS}) gin_trgm_ops) WHERE is_active",
+]
+
+lead_fts = table("lead_fts", column("rowid"), column("rank"))
+
+backend = "like"
+
+def install(conn: Connection) -> None:
+    global backend
+    dialect = conn.dialect.name
+    try:
+        if dialect == "sqlite":
+            exists = conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'lead_fts'").first()
+            if not exists:
+                for ddl in _SQLITE_DDL:
+                    conn.exec_driver_sql(ddl)
+            backend = "fts5"
+        elif dialect == "postgresql":
+            with conn.begin_nested():
+                for ddl in _PG_DDL:
+                    conn.exec_driver_sql(ddl)
+            backend = "pg_trgm"
+    except OperationalError as e:
+        log.warning("lead search index unavailable on %s, falling back to ILIKE: %s", dialect, e)
+        backend = "like"
+
+def detect(conn: Connection) -> None:
+    """Pick the backend from what install() left in the database, without running DDL."""
+    global backend
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        found = conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'lead_fts'").first()
+        backend = "fts5" if found else "like"
+    elif dialect == "postgresql":
+        found = conn.exec_driver_sql("SELECT 1 FROM pg_indexes WHERE indexname = 'ix_lead_search_trgm'").first()
+        backend = "pg_trgm" if found else "like"
+    else:
+        backend = "like"
+
+def _terms(q: str) -> list[str]:
+    return [t for t in q.split() if t]
+
+def _phone_digits(term: str) -> str | None:
+    # "555-0100", "(555) 0100", "+15550100" also match phones stored in another format
+    if any(ch.isalpha() for ch in term):
+        return None
+    digits = re.sub(r"\D", "", term)
+    return digits if len(digits) >= MIN_TERM else None
+
+def _like_clause(term: str):
+    like = f"%{term}%"
+    return or_(
+        col(Lead.first_name).ilike(like),
+        col(Lead.last_name).ilike(like),
+        col(Lead.email).ilike(like),
+        col(Lead.phone).ilike(like),
+    )
+
+def _fts_phrase(term: str) -> str:
+    phrase = '"' + term.replace('"', '""') + '"'
+    digits = _phone_digits(term)
+    if digits and digits != term:
+        return f'({phrase} OR phone_digits : "{digits}")'
+    return phrase
+
+def apply_search(stmt, q: str, ranked: bool = True):
+    """Filter `stmt` (a select over Lead) by the search string `q`.
+
+    Returns `(stmt, order_by)` where `order_by` is a relevance ordering to put
+    ahead of the caller's own ordering, or None when not ranked.
+    """
+    terms = _terms(q)
+    indexed = [t for t in terms if len(t) >= MIN_TERM]
+    short = [t for t in terms if len(t) < MIN_TERM]
+    order_by = None
+
+    if backend == "fts5" and indexed:
+        match = " AND ".join(_fts_phrase(t) for t in indexed)
+        stmt = stmt.join(lead_fts, lead_fts.c.rowid == Lead.id).where(
+            text("lead_fts MATCH :lead_fts_q").bindparams(lead_fts_q=match)
+        )
+        if ranked:
+            order_by = lead_fts.c.rank
+    elif backend == "pg_trgm" and indexed:
+        doc = literal_column(_PG_DOC)
+        clauses = []
+        for t in indexed:
+            clause = doc.ilike(f"%{t}%")
+            digits = _phone_digits(t)
+            if digits:
+                clause = or_(clause, literal_column(_PG_DIGITS).ilike(f"%{digits}%"))
+            clauses.append(clause)
+        stmt = stmt.where(and_(*clauses))
+        if ranked:
+            order_by = func.similarity(doc, q).desc()
+    else:
+        short = terms
+
+    for t in short:
+        stmt = stmt.where(_like_clause(t))
+    return stmt, order_by
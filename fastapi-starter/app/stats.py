@@ -0,0 +1,132 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import NamedTuple, Sequence
+from sqlalchemy import String, and_, cast, delete, func, insert, literal, or_, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import SessionLocal
+from app.models import Activity, ActivityArchive, Lead, LeadArchive, StatCounter
+from app.queries import ACTIVITY_COLUMNS, recent_activities
+
+log = logging.getLogger(__name__)
+
+# Dashboard aggregates kept as (bucket, key) -> count rows in StatCounter. Write paths
+# add their deltas in the same transaction as the row change; `reconcile` rebuilds
+# everything from the real tables to wipe out any drift.
+STATUS = "status"                                # active leads per status
+CREATED_DAY = "created_day"                      # active leads per creation day, key YYYY-MM-DD
+CREATED_MONTH_STATUS = "created_month_status"    # all leads per creation month + status, key YYYY-MM:status
+ACTIVITIES = "activities"                        # activity rows, key "total"
+TOTAL = "total"
+
+class LeadState(NamedTuple):
+    status: str
+    is_active: bool
+    created_at: datetime
+
+    @classmethod
+    def of(cls, lead: Lead) -> "LeadState":
+        return cls(lead.status, lead.is_active, lead.created_at)
+
+def lead_deltas(state: LeadState, sign: int = 1, deltas: Counter | None = None) -> Counter:
+    deltas = deltas if deltas is not None else Counter()
+    if state.is_active:
+        deltas[(STATUS, state.status)] += sign
+        deltas[(CREATED_DAY, state.created_at.date().isoformat())] += sign
+    deltas[(CREATED_MONTH_STATUS, f"{state.created_at:%Y-%m}:{state.status}")] += sign
+    return deltas
+
+def lead_transition(old: LeadState, new: LeadState, deltas: Counter | None = None) -> Counter:
+    deltas = lead_deltas(old, -1, deltas)
+    return lead_deltas(new, 1, deltas)
+
+def activity_deltas(n: int) -> Counter:
+    return Counter({(ACTIVITIES, TOTAL): n})
+
+async def add_counts(session: AsyncSession, model, keys: Sequence[str], rows: Sequence[dict]) -> None:
+    """Upsert `rows` into a counter table, adding each row's count to the existing one."""
+    if not rows:
+        return
+    dialect = session.bind.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(model).values(list(rows))
+        stmt = stmt.on_conflict_do_update(index_elements=list(keys), set_={"count": model.count + stmt.excluded.count})
+        await session.exec(stmt)
+        return
+    for row in rows:
+        result = await session.exec(
+            update(model)
+            .where(*(getattr(model, k) == row[k] for k in keys))
+            .values(count=model.count + row["count"])
+        )
+        if not result.rowcount:
+            await session.exec(insert(model).values(**row))
+
+async def apply(session: AsyncSession, deltas: Counter) -> None:
+    rows = [{"bucket": b, "key": k, "count": n} for (b, k), n in deltas.items() if n]
+    await add_counts(session, StatCounter, ("bucket", "key"), rows)
+
+def snapshot_query(now: datetime):
+    week_start = (now - timedelta(days=7)).date().isoformat()
+    month_closed = f"{now:%Y-%m}:closed"
+    return select(StatCounter).where(or_(
+        StatCounter.bucket.in_([STATUS, ACTIVITIES]),
+        and_(StatCounter.bucket == CREATED_DAY, StatCounter.key >= week_start),
+        and_(StatCounter.bucket == CREATED_MONTH_STATUS, StatCounter.key == month_closed),
+    ))
+
+async def snapshot(session: AsyncSession, now: datetime | None = None) -> dict:
+    rows = (await session.exec(snapshot_query(now or datetime.utcnow()))).all()
+    by_status = sorted((r.key, r.count) for r in rows if r.bucket == STATUS and r.count)
+    return {
+        "total_leads": sum(c for _, c in by_status),
+        "new_leads_this_week": sum(r.count for r in rows if r.bucket == CREATED_DAY),
+        "closed_leads_this_month": sum(r.count for r in rows if r.bucket == CREATED_MONTH_STATUS),
+        "total_activities": sum(r.count for r in rows if r.bucket == ACTIVITIES),
+        "leads_by_status": [{"status": s, "count": c} for s, c in by_status],
+        # the newest rows of ix_activity_date_created, shared by every worker
+        "recent_activities": [dict(zip(ACTIVITY_COLUMNS, r)) for r in (await session.exec(recent_activities(10))).all()],
+    }
+
+def aggregate_queries() -> dict:
+    """The full-table aggregates `reconcile` recomputes, as (bucket, key, count) selects."""
+    day = cast(func.date(Lead.created_at), String)
+    # "all leads" and "all activities" include the archived ones (app/archive.py)
+    every_lead = union_all(
+        select(Lead.created_at, Lead.status), select(LeadArchive.created_at, LeadArchive.status),
+    ).subquery()
+    month_status = func.substr(cast(func.date(every_lead.c.created_at), String), 1, 7).concat(":").concat(every_lead.c.status)
+    activities = (
+        select(func.count()).select_from(Activity).scalar_subquery()
+        + select(func.count()).select_from(ActivityArchive).scalar_subquery()
+    )
+    return {
+        STATUS: select(literal(STATUS), Lead.status, func.count()).where(Lead.is_active == True).group_by(Lead.status),
+        CREATED_DAY: select(literal(CREATED_DAY), day, func.count()).where(Lead.is_active == True).group_by(day),
+        CREATED_MONTH_STATUS: select(literal(CREATED_MONTH_STATUS), month_status, func.count()).group_by(month_status),
+        ACTIVITIES: select(literal(ACTIVITIES), literal(TOTAL), activities),
+    }
+
+async def reconcile(session: AsyncSession) -> None:
+    # DELETE first so SQLite holds the write lock while the aggregates are recomputed
+    await session.exec(delete(StatCounter))
+    for query in aggregate_queries().values():
+        await session.exec(insert(StatCounter).from_select(["bucket", "key", "count"], query))
+    await session.commit()
+
+async def ensure_seeded() -> None:
+    async with SessionLocal() as session:
+        if (await session.exec(select(StatCounter).limit(1))).first() is None:
+            await reconcile(session)
+
+async def reconcile_periodically(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with SessionLocal() as session:
+                await reconcile(session)
+        except Exception:
+            log.exception("dashboard stats reconciliation failed")
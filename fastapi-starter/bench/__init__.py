@@ -0,0 +1,6 @@
+import os
+
+# benchmarks measure raw throughput; rate limiting and load shedding would turn the load
+# generator's own traffic into 429/503s (bench.abuse switches them back on itself)
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("MAX_CONCURRENT_REQUESTS", "0")
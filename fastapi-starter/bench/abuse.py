@@ -0,0 +1,82 @@
+# One integration hammering GET /api/leads?q= with many concurrent requests while a few
+# regular users poll leads and the dashboard; victim latency with and without the rate
+# limiter / load shedder (app/core/ratelimit.py).
+#
+#   python -m bench.abuse --leads 20000 --abuser-concurrency 64 --seconds 10
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+from app.core import metrics
+from app.core.config import settings
+from app.core.ratelimit import shedder
+from app.database import init_db
+from app.main import app
+from bench.datasets import PASSWORD, seed, seed_users
+
+TERMS = ["smith", "jones", "garcia", "nguyen", "patel", "kim", "555-01", "lead1"]
+
+async def token(client: httpx.AsyncClient, username: str) -> dict:
+    r = await client.post("/api/users/login", json={"username": username, "password": PASSWORD})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+async def run(client, abuser: dict, victims: list[dict], n_leads: int, concurrency: int, seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    abuser_codes: Counter = Counter()
+    victim_ms: list[float] = []
+    victim_codes: Counter = Counter()
+
+    async def abuse() -> None:
+        rng = random.Random()
+        while time.perf_counter() < deadline:
+            r = await client.get("/api/leads", params={"q": rng.choice(TERMS), "size": 50}, headers=abuser)
+            abuser_codes[r.status_code] += 1
+
+    async def poll(headers: dict) -> None:
+        rng = random.Random()
+        while time.perf_counter() < deadline:
+            url = rng.choice([f"/api/leads/{rng.randint(1, n_leads)}", "/api/dashboard", "/api/leads?size=20"])
+            t0 = time.perf_counter()
+            r = await client.get(url, headers=headers)
+            victim_ms.append((time.perf_counter() - t0) * 1000)
+            victim_codes[r.status_code] += 1
+            await asyncio.sleep(0.05)
+
+    await asyncio.gather(*(abuse() for _ in range(concurrency)), *(poll(h) for h in victims))
+    q = statistics.quantiles(victim_ms, n=100)
+    print(f"  victims: {len(victim_ms):5} requests  p50={q[49]:8.1f}ms  p99={q[98]:8.1f}ms  statuses={dict(victim_codes)}")
+    print(f"  abuser:  {sum(abuser_codes.values()):5} requests  statuses={dict(abuser_codes)}")
+
+async def main(n_leads: int, n_victims: int, concurrency: int, seconds: float) -> None:
+    await init_db()
+    await seed_users(n_victims + 1)
+    await seed(n_leads, 0, 1)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        abuser = await token(client, "bench0")
+        victims = [await token(client, f"bench{i}") for i in range(1, n_victims + 1)]
+        for protected in (False, True):
+            settings.RATE_LIMIT_ENABLED = protected
+            settings.MAX_CONCURRENT_REQUESTS = 64 if protected else 0
+            shedder._slots = None
+            metrics.reset()
+            print(f"\n{'rate limit + load shedding' if protected else 'unprotected'}")
+            await run(client, abuser, victims, n_leads, concurrency, seconds)
+            print(f"  rejected: { {'/'.join(k): v for k, v in metrics.rejected.totals().items()} }")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leads", type=int, default=20_000)
+    parser.add_argument("--victims", type=int, default=5)
+    parser.add_argument("--abuser-concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.leads, args.victims, args.abuser_concurrency, args.seconds))
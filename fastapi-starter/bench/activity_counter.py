@@ -0,0 +1,79 @@
+# Stress test for Lead.activity_count: thousands of concurrent activity posts at a few
+# hot leads, then assert every counter equals the real number of activity rows.
+#
+#   python -m bench.activity_counter --posts 4000 --hot-leads 3
+#
+# Exits non-zero on any lost or extra increment.
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+from sqlmodel import func, select
+from app.database import SessionLocal, init_db
+from app.main import app
+from app.models import Activity, Lead
+
+async def run(client: httpx.AsyncClient, headers: dict, lead_ids: list[int], posts: int, concurrency: int) -> tuple[float, int]:
+    queue = asyncio.Queue()
+    for i in range(posts):
+        queue.put_nowait(lead_ids[i % len(lead_ids)])
+    failures = 0
+
+    async def worker():
+        nonlocal failures
+        while not queue.empty():
+            lead_id = queue.get_nowait()
+            r = await client.post(f"/api/leads/{lead_id}/activities", headers=headers, json={
+                "activity_type": "call", "title": "stress", "activity_date": "2024-01-01",
+            })
+            failures += r.status_code != 201
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return posts / (time.perf_counter() - t0), failures
+
+async def check(lead_ids: list[int]) -> list[str]:
+    async with SessionLocal() as session:
+        counts = dict((await session.exec(
+            select(Activity.lead_id, func.count()).where(Activity.lead_id.in_(lead_ids)).group_by(Activity.lead_id)
+        )).all())
+        leads = (await session.exec(select(Lead.id, Lead.activity_count).where(Lead.id.in_(lead_ids)))).all()
+    return [f"lead {i}: activity_count={n} rows={counts.get(i, 0)}" for i, n in leads if n != counts.get(i, 0)]
+
+async def main(posts: int, hot_leads: int, levels: list[int]) -> int:
+    await init_db()
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        creds = {"username": "bench", "password": "bench-password"}
+        await client.post("/api/users/register", json={**creds, "email": "bench@example.com", "first_name": "B", "last_name": "B"})
+        token = (await client.post("/api/users/login", json=creds)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        r = await client.post("/api/leads", headers=headers, json=[
+            {"first_name": f"Hot{i}", "last_name": "L", "email": f"hot{i}@example.com", "phone": "555"} for i in range(hot_leads)
+        ])
+        lead_ids = [lead["id"] for lead in r.json()]
+
+        bad = 0
+        for concurrency in levels:
+            rate, failures = await run(client, headers, lead_ids, posts, concurrency)
+            mismatches = await check(lead_ids)
+            bad += failures + len(mismatches)
+            print(f"concurrency={concurrency:<4} {posts} posts over {hot_leads} leads  {rate:8.1f} posts/s  "
+                  f"failed={failures}  {'counts exact' if not mismatches else 'MISMATCH'}")
+            for line in mismatches:
+                print(f"    {line}")
+    return 1 if bad else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=4000)
+    parser.add_argument("--hot-leads", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.posts, args.hot_leads, args.concurrency)))
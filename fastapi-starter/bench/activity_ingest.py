@@ -0,0 +1,64 @@
+# Activities/s for bursts of single-activity posts: the synchronous path (one
+# transaction per post) vs. the write-behind queue (`Prefer: respond-async`).
+#
+#   python -m bench.activity_ingest --posts 5000 --concurrency 64
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+from app.database import init_db
+from app.ingest import ingestor
+from app.main import app
+from bench.datasets import PASSWORD, seed, seed_users
+
+async def burst(client: httpx.AsyncClient, headers: dict, lead_ids: list[int], posts: int, concurrency: int) -> dict:
+    remaining = iter(range(posts))
+    statuses: dict[int, int] = {}
+
+    async def worker():
+        for i in remaining:
+            r = await client.post(f"/api/leads/{lead_ids[i % len(lead_ids)]}/activities", headers=headers, json={
+                "activity_type": "call", "title": "burst", "activity_date": "2024-01-01",
+            })
+            statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return statuses
+
+async def main(posts: int, concurrency: int) -> None:
+    await init_db()
+    await seed_users(1)
+    await seed(100, 0, 1)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        token = (await client.post("/api/users/login", json={"username": "bench0", "password": PASSWORD})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        lead_ids = [lead["id"] for lead in (await client.get("/api/leads", params={"size": 100}, headers=headers)).json()]
+
+        t0 = time.perf_counter()
+        statuses = await burst(client, headers, lead_ids, posts, concurrency)
+        elapsed = time.perf_counter() - t0
+        print(f"sync   {posts} posts  {posts / elapsed:8.1f} activities/s committed  statuses={statuses}")
+
+        t0 = time.perf_counter()
+        statuses = await burst(client, {**headers, "Prefer": "respond-async"}, lead_ids, posts, concurrency)
+        accepted = time.perf_counter() - t0
+        while ingestor.stats()["pending"]:
+            await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - t0
+        s = ingestor.stats()
+        print(f"async  {posts} posts  {posts / accepted:8.1f} activities/s accepted, {s['committed'] / elapsed:8.1f}/s committed "
+              f"in {s['batches']} group commits  statuses={statuses}")
+        await ingestor.drain()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+    asyncio.run(main(args.posts, args.concurrency))
@@ -0,0 +1,70 @@
+# Hot-table size and query cost before and after moving soft-deleted leads to the
+# archive tables (app/archive.py), on a dataset where most leads have been deleted.
+#
+#   python -m bench.archive --leads 200000 --activities 600000 --inactive 0.7
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from sqlalchemy import func, select, text
+from app import archive, queries, stats
+from app.core.config import settings
+from app.database import ReadSessionLocal, init_db
+from app.models import Activity, Lead, LeadArchive
+from app.schemas import LeadFilter
+from bench.datasets import seed, seed_users
+
+def workload() -> dict:
+    return {
+        "leads.list.deep_page": queries.lead_list(LeadFilter()).offset(20_000).limit(10),
+        "leads.list.status": queries.lead_list(LeadFilter(status="closed")).limit(50),
+        "leads.export": queries.lead_export(LeadFilter()),
+        "activities.export": queries.activity_export(LeadFilter()),
+        **{f"stats.reconcile.{b}": q for b, q in stats.aggregate_queries().items()},
+    }
+
+async def measure(label: str, repeat: int) -> None:
+    async with ReadSessionLocal() as session:
+        counts = {t.__tablename__: await session.scalar(select(func.count()).select_from(t)) for t in (Lead, Activity, LeadArchive)}
+        print(f"\n{label}: " + "  ".join(f"{k}={v}" for k, v in counts.items()))
+        if session.bind.dialect.name == "sqlite":
+            # b-tree bytes per table, indexes included (needs SQLITE_ENABLE_DBSTAT_VTAB)
+            sizes = (await session.exec(text(
+                "SELECT m.tbl_name, sum(s.pgsize) FROM dbstat s JOIN sqlite_master m ON m.name = s.name "
+                "WHERE m.tbl_name IN ('lead', 'activity', 'lead_archive', 'activity_archive') GROUP BY m.tbl_name"
+            ))).all()
+            print("  " + "  ".join(f"{name}={size / 2**20:.1f}MiB" for name, size in sizes))
+        for name, stmt in workload().items():
+            times = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                (await session.exec(stmt)).all()
+                times.append((time.perf_counter() - t0) * 1000)
+            print(f"  {name:<40} {statistics.median(times):9.2f}ms")
+
+async def main(n_leads: int, n_activities: int, inactive: float, repeat: int) -> None:
+    await init_db()
+    user_ids = await seed_users(1)
+    await seed(n_leads, n_activities, user_ids, inactive=inactive)
+    await measure("before", repeat)
+    settings.ARCHIVE_BATCH_SIZE = 5000
+    t0 = time.perf_counter()
+    # seeded leads were "deleted" when created, up to a year ago
+    totals = await archive.run(datetime.utcnow() + timedelta(days=settings.ARCHIVE_AFTER_DAYS))
+    print(f"\narchived {totals['archived_leads']} leads / {totals['archived_activities']} activities in {time.perf_counter() - t0:.2f}s")
+    await measure("after", repeat)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leads", type=int, default=200_000)
+    parser.add_argument("--activities", type=int, default=600_000)
+    parser.add_argument("--inactive", type=float, default=0.7, help="share of leads soft-deleted")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.leads, args.activities, args.inactive, args.repeat))
@@ -0,0 +1,61 @@
+# Cold-start budget check: boots the app in fresh interpreters against one existing
+# database (import app.main + on_startup, like a new autoscaled worker) and reports the
+# median of each phase from app/core/startup.py. Exits 1 if the median total is over
+# --budget-ms, so it can gate CI.
+#
+#   python -m bench.cold_start --runs 10 --budget-ms 1500
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BOOT = """
+import asyncio, json
+import app.main as m
+async def boot():
+    await m.on_startup()
+    await m.on_shutdown()
+asyncio.run(boot())
+print(json.dumps(m.profile.report()))
+"""
+
+def boot(env: dict) -> tuple[dict, float]:
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", BOOT], env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1]), (time.perf_counter() - t0) * 1000
+
+def main(runs: int, budget_ms: float) -> int:
+    env = {
+        **os.environ,
+        "DATABASE_URL": os.environ.get("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/cold.db"),
+        "STATS_RECONCILE_SECONDS": "0", "ARCHIVE_INTERVAL_SECONDS": "0",
+    }
+    first, _ = boot(env)  # creates and stamps the schema
+    print(f"first boot (new database): {first['total_ms']:.0f}ms  steps {first['steps_ms']}")
+    reports, walls = [], []
+    for _ in range(runs):
+        report, wall = boot(env)
+        reports.append(report)
+        walls.append(wall)
+    median = statistics.median
+    phases = {"import": median(r["import_ms"] for r in reports)}
+    for name in reports[0]["steps_ms"]:
+        phases[name] = median(r["steps_ms"][name] for r in reports)
+    total = median(r["total_ms"] for r in reports)
+    print(f"warm boots ({runs}): " + "  ".join(f"{name} {ms:.0f}ms" for name, ms in phases.items())
+          + f"  | app total {total:.0f}ms, process wall {median(walls):.0f}ms")
+    if budget_ms and total > budget_ms:
+        print(f"over budget: {total:.0f}ms > {budget_ms:.0f}ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=0, help="fail if the median import + startup is slower; 0 = report only")
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.budget_ms))
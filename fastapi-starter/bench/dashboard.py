@@ -0,0 +1,72 @@
+# GET /api/dashboard (incremental counters) vs. the old six live aggregate queries.
+#
+#   python -m bench.dashboard --leads 200000 --activities 400000
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+from sqlmodel import func, select
+from app import stats
+from app.database import SessionLocal, init_db
+from app.main import app
+from app.models import Activity, Lead
+from bench.datasets import seed
+
+async def legacy_dashboard() -> None:
+    now = datetime.utcnow()
+    week_ago = now - timedelta(days=7)
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    async with SessionLocal() as session:
+        await session.exec(select(func.count()).select_from(Lead).where(Lead.is_active == True))
+        await session.exec(select(func.count()).select_from(Lead).where(Lead.is_active == True, Lead.created_at >= week_ago))
+        await session.exec(select(func.count()).select_from(Lead).where(Lead.status == "closed", Lead.created_at >= month_start))
+        await session.exec(select(func.count()).select_from(Activity))
+        (await session.exec(select(Lead.status, func.count(Lead.id)).where(Lead.is_active == True).group_by(Lead.status))).all()
+        (await session.exec(select(Activity).order_by(Activity.activity_date.desc(), Activity.created_at.desc()).limit(10))).all()
+
+async def timed(fn, n: int) -> list[float]:
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+def report(name: str, samples: list[float]) -> None:
+    ordered = sorted(samples)
+    print(f"{name:<28} p50={statistics.median(ordered):8.2f}ms  p99={ordered[int(len(ordered) * 0.99) - 1]:8.2f}ms")
+
+async def main(n_leads: int, n_activities: int, reps: int) -> None:
+    await init_db()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        creds = {"username": "bench", "password": "bench-password"}
+        r = await client.post("/api/users/register", json={**creds, "email": "bench@example.com", "first_name": "B", "last_name": "B"})
+        await seed(n_leads, n_activities, r.json()["id"])
+        async with SessionLocal() as session:
+            t0 = time.perf_counter()
+            await stats.reconcile(session)
+            print(f"seeded {n_leads} leads / {n_activities} activities; reconcile took {(time.perf_counter() - t0) * 1000:.0f}ms")
+        token = (await client.post("/api/users/login", json=creds)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        async def endpoint():
+            assert (await client.get("/api/dashboard", headers=headers)).status_code == 200
+
+        report("legacy six queries", await timed(legacy_dashboard, reps))
+        report("GET /api/dashboard", await timed(endpoint, reps))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leads", type=int, default=100_000)
+    parser.add_argument("--activities", type=int, default=200_000)
+    parser.add_argument("--reps", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.leads, args.activities, args.reps))
@@ -0,0 +1,77 @@
+# Synthetic CRM data, written with set-based core INSERTs straight through the app engine.
+import random
+from datetime import date, datetime, timedelta
+from typing import NamedTuple, Sequence
+from sqlalchemy import func, insert, select, update
+from app.core.security import pwd_context
+from app.database import engine
+from app.models import Activity, Lead, User
+
+STATUSES = ["new", "contacted", "qualified", "negotiation", "closed", "lost"]
+SOURCES = ["website", "referral", "zillow", "open_house", "social"]
+ACTIVITY_TYPES = ["call", "email", "meeting", "note"]
+CHUNK = 5000
+PASSWORD = "bench-password"
+
+class Scale(NamedTuple):
+    users: int
+    leads: int
+    activities: int
+
+SCALES = {
+    "10k": Scale(users=10, leads=10_000, activities=30_000),
+    "1m": Scale(users=100, leads=1_000_000, activities=3_000_000),
+    "10m": Scale(users=500, leads=10_000_000, activities=30_000_000),
+}
+
+async def seed_users(n_users: int) -> list[int]:
+    """Users `bench0..benchN-1`, all with password PASSWORD (hashed once)."""
+    password_hash = pwd_context().hash(PASSWORD)
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        result = await conn.execute(insert(User).returning(User.id), [{
+            "username": f"bench{i}", "email": f"bench{i}@example.com", "password_hash": password_hash,
+            "first_name": "Bench", "last_name": f"User{i}", "created_at": now,
+        } for i in range(n_users)])
+        return sorted(result.scalars().all())
+
+async def seed(n_leads: int, n_activities: int, user_id: int | Sequence[int], seed: int = 42, inactive: float = 0.1) -> None:
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    user_ids = [user_id] if isinstance(user_id, int) else list(user_id)
+    async with engine.begin() as conn:
+        first_id = ((await conn.execute(select(func.max(Lead.id)))).scalar() or 0) + 1
+        for start in range(0, n_leads, CHUNK):
+            rows = []
+            for i in range(start, min(start + CHUNK, n_leads)):
+                created = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+                budget = rng.choice([None, rng.randint(1, 20) * 50_000])
+                rows.append({
+                    "first_name": f"First{i}", "last_name": rng.choice(["Smith", "Jones", "Garcia", "Nguyen", "Patel", "Kim"]) + str(i % 997),
+                    "email": f"lead{i}@example.com", "phone": f"+1-555-{i % 10_000:04d}",
+                    "status": rng.choice(STATUSES), "source": rng.choice(SOURCES),
+                    "budget_min": budget, "budget_max": budget and budget + 100_000, "property_interest": None,
+                    "is_active": rng.random() >= inactive, "created_at": created, "updated_at": created, "activity_count": 0,
+                })
+            await conn.execute(insert(Lead), rows)
+    await seed_activities(n_activities, user_ids, first_id, first_id + max(n_leads, 1) - 1, rng)
+
+async def seed_activities(n_activities: int, user_ids: Sequence[int], first_id: int, last_id: int, rng: random.Random | None = None) -> None:
+    """Activities spread over leads first_id..last_id, dated within the last year."""
+    rng = rng or random.Random(42)
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        for start in range(0, n_activities, CHUNK):
+            await conn.execute(insert(Activity), [{
+                "lead_id": rng.randint(first_id, last_id), "user_id": rng.choice(user_ids), "activity_type": rng.choice(ACTIVITY_TYPES),
+                "title": "Follow-up", "notes": None, "duration": rng.choice([None, 5, 15, 30]),
+                "activity_date": date.today() - timedelta(days=rng.randint(0, 365)), "created_at": now, "user_name": "Bench User",
+            } for _ in range(min(CHUNK, n_activities - start))])
+        if n_activities:
+            counts = select(func.count()).where(Activity.lead_id == Lead.id).scalar_subquery()
+            await conn.execute(update(Lead).where(Lead.id >= first_id, Lead.id <= last_id).values(activity_count=counts))
+
+async def seed_scale(scale: Scale, seed_value: int = 42) -> list[int]:
+    user_ids = await seed_users(scale.users)
+    await seed(scale.leads, scale.activities, user_ids, seed_value)
+    return user_ids
@@ -0,0 +1,74 @@
+# Mixed read/write load against the SQLite engine profile.
+#
+#   python -m bench.db_concurrency                  # WAL + pragmas + read pool / single writer
+#   DB_SPLIT_READ_WRITE=false SQLITE_JOURNAL_MODE=delete SQLITE_SYNCHRONOUS=full \
+#     SQLITE_MMAP_SIZE=0 SQLITE_CACHE_SIZE=-2000 python -m bench.db_concurrency   # legacy profile
+#
+# Runs the app in-process over an ASGI transport against a throwaway SQLite file.
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+from app.database import init_db, read_engine, engine
+from app.main import app
+from bench.datasets import seed
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+async def main(n_leads: int, workers: int, write_ratio: float, duration: float) -> None:
+    await init_db()
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        creds = {"username": "bench", "password": "bench-password"}
+        r = await client.post("/api/users/register", json={**creds, "email": "bench@example.com", "first_name": "B", "last_name": "B"})
+        await seed(n_leads, n_leads, r.json()["id"])
+        token = (await client.post("/api/users/login", json=creds)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        latencies = {"read": [], "write": []}
+        errors = {"read": 0, "write": 0}  # 5xx only; soft-deleted leads 404 by design
+        deadline = time.perf_counter() + duration
+
+        async def worker(rng: random.Random):
+            while time.perf_counter() < deadline:
+                lead_id = rng.randint(1, n_leads)
+                kind = "write" if rng.random() < write_ratio else "read"
+                t0 = time.perf_counter()
+                if kind == "write":
+                    resp = await client.post(f"/api/leads/{lead_id}/activities", headers=headers, json={
+                        "activity_type": "call", "title": "bench", "activity_date": "2024-01-01",
+                    })
+                elif rng.random() < 0.5:
+                    resp = await client.get("/api/leads", headers=headers, params={"size": 50, "page": rng.randint(1, 20)})
+                else:
+                    resp = await client.get(f"/api/leads/{lead_id}/activities", headers=headers)
+                latencies[kind].append((time.perf_counter() - t0) * 1000)
+                if resp.status_code >= 500:
+                    errors[kind] += 1
+
+        await asyncio.gather(*(worker(random.Random(i)) for i in range(workers)))
+
+    split = read_engine is not engine
+    print(f"profile: journal={os.environ.get('SQLITE_JOURNAL_MODE', 'wal')} split={split} "
+          f"workers={workers} write_ratio={write_ratio:.0%}")
+    for kind, samples in latencies.items():
+        print(f"{kind:<5}  n={len(samples):>6}  ({len(samples) / duration:7.1f}/s)  errors={errors[kind]:<4}  "
+              f"p50={statistics.median(samples) if samples else 0:7.1f}ms  p99={percentile(samples, 99):7.1f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leads", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--duration", type=float, default=20.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.leads, args.workers, args.write_ratio, args.duration))
@@ -0,0 +1,70 @@
+# Frontend-style polling of GET /api/leads/{id} and /api/leads/{id}/activities, with and
+# without If-None-Match. Reports bytes on the wire, SQL time (from app.core.metrics) and
+# latency per mode.
+#
+#   python -m bench.etag_polling --leads 200 --activities-per-lead 50 --rounds 20 --change-rate 0.05
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+from app.core import metrics
+from app.database import init_db
+from app.main import app
+from bench.datasets import PASSWORD, seed_users, seed
+
+async def main(n_leads: int, per_lead: int, rounds: int, change_rate: float) -> None:
+    await init_db()
+    await seed_users(1)
+    await seed(n_leads, n_leads * per_lead, 1)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        token = (await client.post("/api/users/login", json={"username": "bench0", "password": PASSWORD})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        page = (await client.get("/api/leads", params={"size": n_leads, "cursor": ""}, headers=headers)).json()
+        lead_ids = [lead["id"] for lead in page["items"]]
+        urls = [u for i in lead_ids for u in (f"/api/leads/{i}", f"/api/leads/{i}/activities")]
+
+        for conditional in (False, True):
+            rng = random.Random(7)
+            etags: dict[str, str] = {}
+            wire_bytes = statuses_304 = 0
+            latencies: list[float] = []
+            metrics.reset()
+            for _ in range(rounds):
+                # a few leads change between polls: half get edited, half get a new activity
+                for lead_id in rng.sample(lead_ids, int(len(lead_ids) * change_rate)):
+                    if rng.random() < 0.5:
+                        await client.put(f"/api/leads/{lead_id}", headers=headers, json={"status": rng.choice(["new", "contacted"])})
+                    else:
+                        await client.post(f"/api/leads/{lead_id}/activities", headers=headers, json={
+                            "activity_type": "call", "title": "poll", "activity_date": "2024-01-01",
+                        })
+                for url in urls:
+                    h = {**headers, "If-None-Match": etags[url]} if conditional and url in etags else headers
+                    t0 = time.perf_counter()
+                    r = await client.get(url, headers=h)
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                    wire_bytes += len(r.content)
+                    statuses_304 += r.status_code == 304
+                    if "etag" in r.headers:
+                        etags[url] = r.headers["etag"]
+            db_seconds = sum(total for (method, route), (total, _) in metrics.request_db_time.totals().items() if method == "GET")
+            print(f"{'If-None-Match' if conditional else 'unconditional':<14} polls={len(latencies)}  304s={statuses_304:<5} "
+                  f"body={wire_bytes / 1024:9.1f}KiB  sql={db_seconds * 1000:8.1f}ms  "
+                  f"p50={statistics.median(latencies):.2f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leads", type=int, default=200)
+    parser.add_argument("--activities-per-lead", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--change-rate", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(main(args.leads, args.activities_per_lead, args.rounds, args.change_rate))
@@ -0,0 +1,50 @@
+# Multi-select actions on N leads: one PUT/DELETE per lead vs. one batch-update /
+# batch-delete call.
+#
+#   python -m bench.lead_batch --leads 10000
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+from app.database import init_db
+from app.main import app
+from bench.datasets import PASSWORD, seed, seed_users
+
+async def main(n_leads: int) -> None:
+    await init_db()
+    await seed_users(1)
+    await seed(2 * n_leads, 0, 1, inactive=0)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        token = (await client.post("/api/users/login", json={"username": "bench0", "password": PASSWORD})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        per_lead, batched = list(range(1, n_leads + 1)), list(range(n_leads + 1, 2 * n_leads + 1))
+
+        t0 = time.perf_counter()
+        for lead_id in per_lead:
+            await client.put(f"/api/leads/{lead_id}", headers=headers, json={"status": "qualified"})
+        put_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        r = await client.post("/api/leads/batch-update", headers=headers, json={"ids": batched, "changes": {"status": "qualified"}})
+        batch_s = time.perf_counter() - t0
+        print(f"status change  per-lead PUT: {put_s:8.2f}s ({n_leads} requests)   batch-update: {batch_s:8.3f}s (matched {r.json()['matched']})")
+
+        t0 = time.perf_counter()
+        for lead_id in per_lead:
+            await client.delete(f"/api/leads/{lead_id}", headers=headers)
+        delete_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        r = await client.post("/api/leads/batch-delete", headers=headers, json={"ids": batched})
+        batch_s = time.perf_counter() - t0
+        print(f"delete         per-lead DELETE: {delete_s:6.2f}s ({n_leads} requests)   batch-delete: {batch_s:8.3f}s (matched {r.json()['matched']})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leads", type=int, default=10_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.leads))
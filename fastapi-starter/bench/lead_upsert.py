@@ -0,0 +1,65 @@
+# Re-syncing N known contacts from an outside source: search-then-PUT per contact (how a
+# client dedupes without upsert) vs. one NDJSON import with ?upsert=true. The re-sent
+# rows differ in email case and phone formatting from what was stored.
+#
+#   python -m bench.lead_upsert --leads 5000
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+import orjson
+from sqlalchemy import func
+from sqlmodel import select
+from app.database import SessionLocal, init_db
+from app.main import app
+from app.models import Lead
+from bench.datasets import PASSWORD, seed, seed_users
+
+def resent(i: int, status: str) -> dict:
+    return {
+        "first_name": f"First{i}", "last_name": "Synced", "email": f"LEAD{i}@Example.com",
+        "phone": f"1 (555) {i % 10_000:04d}", "status": status,
+    }
+
+async def main(n_leads: int) -> None:
+    await init_db()
+    await seed_users(1)
+    await seed(2 * n_leads, 0, 1, inactive=0)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        token = (await client.post("/api/users/login", json={"username": "bench0", "password": PASSWORD})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        t0 = time.perf_counter()
+        for i in range(n_leads):
+            row = resent(i, "qualified")
+            found = (await client.get("/api/leads", headers=headers, params={"q": row["email"], "size": 1})).json()
+            lead_id = found[0]["id"]
+            await client.put(f"/api/leads/{lead_id}", headers=headers, json=row)
+        search_put_s = time.perf_counter() - t0
+
+        body = b"\n".join(orjson.dumps(resent(i, "qualified")) for i in range(n_leads, 2 * n_leads))
+        t0 = time.perf_counter()
+        r = await client.post(
+            "/api/leads/import", params={"upsert": "true"}, content=body,
+            headers={**headers, "Content-Type": "application/x-ndjson"},
+        )
+        upsert_s = time.perf_counter() - t0
+        result = r.json()
+
+    async with SessionLocal() as session:
+        live = await session.scalar(select(func.count()).select_from(Lead).where(Lead.is_active == True))
+    print(f"re-sync {n_leads} contacts  search+PUT: {search_put_s:8.2f}s ({2 * n_leads} requests)   "
+          f"import?upsert=true: {upsert_s:7.3f}s (inserted {result['inserted']}, updated {result['updated']})")
+    print(f"live leads after both: {live} (seeded {2 * n_leads})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leads", type=int, default=5_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.leads))
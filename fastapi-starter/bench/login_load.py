@@ -0,0 +1,70 @@
+# Latency of GET /api/leads while /api/users/login is hammered concurrently.
+#
+#   python -m bench.login_load                      # hashing on the worker pool
+#   HASH_WORKERS=0 python -m bench.login_load       # legacy: hashing on the event loop
+#
+# Runs the app in-process over an ASGI transport against a throwaway SQLite file.
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+from app.database import init_db
+from app.main import app
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def main(login_workers: int, reads: int) -> None:
+    await init_db()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        creds = {"username": "bench", "password": "bench-password"}
+        await client.post("/api/users/register", json={**creds, "email": "bench@example.com", "first_name": "B", "last_name": "B"})
+        token = (await client.post("/api/users/login", json=creds)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        await client.post("/api/leads", headers=headers, json=[
+            {"first_name": f"F{i}", "last_name": "L", "email": f"l{i}@example.com", "phone": "555"} for i in range(50)
+        ])
+
+        stop = asyncio.Event()
+        logins = {"ok": 0, "shed": 0}
+
+        async def login_loop():
+            while not stop.is_set():
+                r = await client.post("/api/users/login", json=creds)
+                logins["ok" if r.status_code == 200 else "shed"] += 1
+
+        latencies: list[float] = []
+
+        async def read_loop():
+            for _ in range(reads):
+                t0 = time.perf_counter()
+                await client.get("/api/leads", headers=headers)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                await asyncio.sleep(0.005)
+
+        tasks = [asyncio.create_task(login_loop()) for _ in range(login_workers)]
+        started = time.perf_counter()
+        await read_loop()
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    print(f"HASH_WORKERS={os.environ.get('HASH_WORKERS', 'default')} login_concurrency={login_workers}")
+    print(f"/api/leads  n={len(latencies)}  p50={statistics.median(latencies):.1f}ms  "
+          f"p95={percentile(latencies, 95):.1f}ms  p99={percentile(latencies, 99):.1f}ms")
+    print(f"/api/users/login  ok={logins['ok']} shed={logins['shed']}  ({logins['ok'] / elapsed:.1f}/s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--login-concurrency", type=int, default=16)
+    parser.add_argument("--reads", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.login_concurrency, args.reads))
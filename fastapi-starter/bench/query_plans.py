@@ -0,0 +1,112 @@
+# Query-plan regression check: seeds a dataset, EXPLAINs every statement the routers run
+# (built from app/queries.py and app/stats.py) and exits non-zero if any of them falls
+# back to a full table scan it isn't allowed.
+#
+#   python -m bench.query_plans                       # throwaway SQLite file
+#   DATABASE_URL=postgresql+asyncpg://... python -m bench.query_plans --leads 0   # existing data
+import argparse
+import asyncio
+import os
+import re
+import sys
+import tempfile
+from datetime import date, datetime
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/plans.db")
+
+from sqlalchemy import insert
+from sqlmodel import select
+from app import archive, queries, rollups, stats
+from app.database import engine, init_db
+from app.models import Lead, User
+from app.schemas import ActivityFilter, ActivityOut, LeadFilter, LeadOut
+from bench.datasets import seed
+
+HOT_TABLES = ("lead", "activity", "user", "statcounter", "dailyrollup")
+
+# name -> (statement, full scan allowed)
+def checks() -> dict:
+    now = datetime.utcnow()
+    lead_cols, activity_cols = list(LeadOut.model_fields), list(ActivityOut.model_fields)
+    out = {
+        "leads.list": (queries.lead_list(LeadFilter()).limit(10), False),
+        "leads.list.deep_page": (queries.lead_list(LeadFilter()).offset(5000).limit(10), False),
+        "leads.list.cursor": (queries.lead_list(LeadFilter(), after=(now, 10**9)).limit(10), False),
+        "leads.list.status": (queries.lead_list(LeadFilter(status="closed")).limit(10), False),
+        "leads.list.source": (queries.lead_list(LeadFilter(source="referral")).limit(10), False),
+        "leads.list.budget": (queries.lead_list(LeadFilter(min_budget=300_000, max_budget=400_000)).limit(10), False),
+        "leads.search": (queries.lead_list(LeadFilter(q="smith"), ranked=True).limit(10), False),
+        "leads.search.phone": (queries.lead_list(LeadFilter(q="555-0042"), ranked=True).limit(10), False),
+        "leads.get": (queries.lead_by_id(1), False),
+        "leads.batch.ids": (queries.select_leads(select(Lead.id, Lead.status), list(range(1, 500))), False),
+        "leads.batch.filter": (queries.select_leads(select(Lead.id, Lead.status), f=LeadFilter(status="new", source="zillow")), False),
+        "leads.upsert.existing": (queries.leads_by_email(select(Lead.id, Lead.status), [f"lead{i}@example.com" for i in range(500)]), False),
+        "leads.get.version": (queries.lead_version(1), False),
+        "activities.version": (queries.activity_version(1), False),
+        "auth.current_user": (select(User).where(User.username == "bench"), False),
+        "activities.timeline": (queries.activity_timeline(1).limit(100), False),
+        "activities.timeline.cursor": (queries.activity_timeline(1, after=(now.date(), now, 10**9)).limit(100), False),
+        "activities.timeline.filtered": (queries.activity_timeline(1, ActivityFilter(
+            date_from=date(2024, 1, 1), date_to=now.date(), activity_type="call",
+        )).limit(100), False),
+        "archive.candidates": (archive._archivable(now, 500), False),
+        "dashboard.snapshot": (stats.snapshot_query(now), False),
+        "dashboard.recent": (queries.recent_activities(10), False),
+        "reports.activity_timeseries": (queries.rollup_range(rollups.ACTIVITY_TYPE, date(2024, 1, 1), now.date()), False),
+        # exports and reconciliation read everything by design
+        "leads.export": (queries.lead_export(LeadFilter(), lead_cols), True),
+        "activities.export": (queries.activity_export(LeadFilter(status="new"), activity_cols), True),
+    }
+    for bucket, query in stats.aggregate_queries().items():
+        out[f"stats.reconcile.{bucket}"] = (query, True)
+    return out
+
+def full_scans(dialect: str, plan: list[str]) -> list[str]:
+    if dialect == "sqlite":
+        # "SCAN lead" is a table scan; "SCAN lead USING [COVERING] INDEX ..." walks an index
+        pattern = re.compile(rf"^SCAN ({'|'.join(HOT_TABLES)})$")
+    else:
+        pattern = re.compile(rf"Seq Scan on ({'|'.join(HOT_TABLES)})\b")
+    return [line for line in plan if pattern.search(line.strip())]
+
+async def explain(conn, stmt) -> list[str]:
+    dialect = conn.dialect
+    sql = str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    if dialect.name == "sqlite":
+        rows = (await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)).all()
+        return [r[-1] for r in rows]
+    rows = (await conn.exec_driver_sql("EXPLAIN " + sql)).all()
+    return [r[0] for r in rows]
+
+async def main(n_leads: int, n_activities: int, verbose: bool) -> int:
+    await init_db()
+    if n_leads:
+        async with engine.begin() as conn:
+            user_id = (await conn.execute(insert(User).values(
+                username="bench", email="bench@example.com", password_hash="x",
+                first_name="Bench", last_name="User", created_at=datetime.utcnow(),
+            ))).inserted_primary_key[0]
+        await seed(n_leads, n_activities, user_id)
+    async with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            await conn.exec_driver_sql("ANALYZE")
+        failures = 0
+        for name, (stmt, scan_ok) in checks().items():
+            plan = await explain(conn, stmt)
+            scans = full_scans(conn.dialect.name, plan)
+            bad = scans and not scan_ok
+            failures += bool(bad)
+            print(f"{'FAIL' if bad else 'ok':<4} {name}")
+            if bad or verbose:
+                for line in plan:
+                    print(f"       {line}")
+    print(f"\n{failures} query plan regression(s)")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leads", type=int, default=50_000)
+    parser.add_argument("--activities", type=int, default=100_000)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.leads, args.activities, args.verbose)))
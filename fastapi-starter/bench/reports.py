@@ -0,0 +1,72 @@
+# One-year activity chart: /api/reports/activity-timeseries (rollups) vs. the equivalent
+# GROUP BY over the activity table, as history grows.
+#
+#   python -m bench.reports --activities 1000000 3000000
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+from sqlalchemy import func, select
+from app import rollups
+from app.database import ReadSessionLocal, SessionLocal, init_db
+from app.main import app
+from app.models import Activity
+from bench.datasets import PASSWORD, seed, seed_activities, seed_users
+
+def raw_query(date_from: date, date_to: date):
+    return (
+        select(Activity.activity_date, Activity.activity_type, func.count())
+        .where(Activity.activity_date >= date_from, Activity.activity_date <= date_to)
+        .group_by(Activity.activity_date, Activity.activity_type)
+    )
+
+def median_ms(times: list[float]) -> float:
+    return statistics.median(times) * 1000
+
+async def main(sizes: list[int], n_leads: int, repeat: int) -> None:
+    await init_db()
+    user_ids = await seed_users(10)
+    await seed(n_leads, 0, user_ids)
+    date_to = date.today()
+    date_from = date_to - timedelta(days=364)
+    params = {"from": date_from.isoformat(), "to": date_to.isoformat(), "interval": "week", "group_by": "activity_type"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        token = (await client.post("/api/users/login", json={"username": "bench0", "password": PASSWORD})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        seeded = 0
+        for total in sizes:
+            await seed_activities(total - seeded, user_ids, 1, n_leads, random.Random(total))
+            seeded = total
+            t0 = time.perf_counter()
+            async with SessionLocal() as session:
+                await rollups.backfill(session)
+            backfill_s = time.perf_counter() - t0
+
+            api, raw = [], []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                r = await client.get("/api/reports/activity-timeseries", params=params, headers=headers)
+                api.append(time.perf_counter() - t0)
+                t0 = time.perf_counter()
+                async with ReadSessionLocal() as session:
+                    (await session.exec(raw_query(date_from, date_to))).all()
+                raw.append(time.perf_counter() - t0)
+            print(f"activities={total:>10,}  report endpoint={median_ms(api):8.2f}ms ({len(r.json()['points'])} points)  "
+                  f"GROUP BY activity={median_ms(raw):9.1f}ms  backfill={backfill_s:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--activities", type=int, nargs="+", default=[1_000_000, 3_000_000])
+    parser.add_argument("--leads", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(sorted(args.activities), args.leads, args.repeat))
@@ -0,0 +1,311 @@
+# Load-test suite: seeds a dataset at a named scale, drives a weighted scenario mix
+# against the API and reports throughput and p50/p95/p99 per endpoint. Results are
+# written as JSON and can be compared against a stored baseline.
+#
+#   python -m bench.run                                          # 10k dataset, mixed traffic, in-process ASGI
+#   python -m bench.run --scale 1m --db /data/bench-1m.db --scenario search --uvicorn
+#   python -m bench.run --url http://127.0.0.1:8000 --no-seed    # server already running on seeded data
+#   python -m bench.run --save-baseline bench/baselines/mixed-10k.json
+#   python -m bench.run --baseline bench/baselines/mixed-10k.json --threshold 0.15   # exits 1 on regression
+#
+# --db keeps the dataset between runs (seeding is skipped when it already has leads);
+# without it every run seeds a throwaway SQLite file.
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SEARCH_TERMS = ["smith", "garcia1", "nguyen42", "lead123", "First99", "555-01", "patel", "example.com"]
+
+# scenario -> {operation: weight}
+SCENARIOS = {
+    "mixed": {
+        "list": 25, "search": 20, "get": 10, "timeline": 10, "dashboard": 15,
+        "add_activity": 15, "login": 3, "import": 2,
+    },
+    "search": {"search": 70, "list": 15, "get": 15},
+    "dashboard": {"dashboard": 80, "add_activity": 20},
+    "import": {"import": 60, "list": 20, "dashboard": 20},
+}
+
+class Context:
+    def __init__(self, client, tokens: list[str], lead_ids: list[int], import_rows: int):
+        self.client = client
+        self.tokens = tokens
+        self.lead_ids = lead_ids
+        self.import_rows = import_rows
+
+    def headers(self, rng: random.Random) -> dict:
+        return {"Authorization": f"Bearer {rng.choice(self.tokens)}"}
+
+async def op_list(ctx: Context, rng: random.Random):
+    params = {"page": rng.randint(1, 20), "size": 20}
+    if rng.random() < 0.3:
+        params["status"] = rng.choice(["new", "contacted", "qualified", "closed"])
+    return "GET /api/leads", await ctx.client.get("/api/leads", params=params, headers=ctx.headers(rng))
+
+async def op_search(ctx: Context, rng: random.Random):
+    params = {"q": rng.choice(SEARCH_TERMS), "size": 20}
+    return "GET /api/leads?q", await ctx.client.get("/api/leads", params=params, headers=ctx.headers(rng))
+
+async def op_get(ctx: Context, rng: random.Random):
+    return "GET /api/leads/{id}", await ctx.client.get(f"/api/leads/{rng.choice(ctx.lead_ids)}", headers=ctx.headers(rng))
+
+async def op_timeline(ctx: Context, rng: random.Random):
+    lead_id = rng.choice(ctx.lead_ids)
+    return "GET /api/leads/{id}/activities", await ctx.client.get(f"/api/leads/{lead_id}/activities", headers=ctx.headers(rng))
+
+async def op_dashboard(ctx: Context, rng: random.Random):
+    return "GET /api/dashboard", await ctx.client.get("/api/dashboard", headers=ctx.headers(rng))
+
+async def op_add_activity(ctx: Context, rng: random.Random):
+    lead_id = rng.choice(ctx.lead_ids)
+    body = {"activity_type": rng.choice(["call", "email", "meeting"]), "title": "Load test", "activity_date": date.today().isoformat()}
+    return "POST /api/leads/{id}/activities", await ctx.client.post(f"/api/leads/{lead_id}/activities", json=body, headers=ctx.headers(rng))
+
+async def op_login(ctx: Context, rng: random.Random):
+    from bench.datasets import PASSWORD
+    creds = {"username": f"bench{rng.randrange(len(ctx.tokens))}", "password": PASSWORD}
+    return "POST /api/users/login", await ctx.client.post("/api/users/login", json=creds)
+
+async def op_import(ctx: Context, rng: random.Random):
+    tag = rng.getrandbits(32)
+    body = "".join(json.dumps({
+        "first_name": f"Imported{i}", "last_name": f"Batch{tag}", "email": f"imp{tag}-{i}@example.com",
+        "phone": f"+1-555-{rng.randint(0, 9999):04d}", "status": "new", "source": "website",
+    }) + "\n" for i in range(ctx.import_rows))
+    headers = {**ctx.headers(rng), "Content-Type": "application/x-ndjson"}
+    return "POST /api/leads/import", await ctx.client.post("/api/leads/import", content=body, headers=headers)
+
+OPERATIONS = {
+    "list": op_list, "search": op_search, "get": op_get, "timeline": op_timeline, "dashboard": op_dashboard,
+    "add_activity": op_add_activity, "login": op_login, "import": op_import,
+}
+
+def percentile(ordered: list[float], pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def summarize(samples: dict[str, list[float]], errors: dict[str, int], elapsed: float) -> dict:
+    out = {}
+    for label, latencies in sorted(samples.items()):
+        ordered = sorted(latencies)
+        out[label] = {
+            "n": len(ordered),
+            "rps": round(len(ordered) / elapsed, 2),
+            "errors": errors.get(label, 0),
+            "p50_ms": round(statistics.median(ordered), 2),
+            "p95_ms": round(percentile(ordered, 95), 2),
+            "p99_ms": round(percentile(ordered, 99), 2),
+        }
+    return out
+
+def print_report(result: dict) -> None:
+    meta = result["meta"]
+    print(f"scenario={meta['scenario']} scale={meta['scale']} target={meta['target']} "
+          f"concurrency={meta['concurrency']} duration={meta['duration_s']}s")
+    print(f"{'endpoint':<34}{'n':>7}{'req/s':>9}{'err':>6}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for label, s in result["endpoints"].items():
+        print(f"{label:<34}{s['n']:>7}{s['rps']:>9.1f}{s['errors']:>6}{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}")
+    total = result["total"]
+    print(f"{'total':<34}{total['n']:>7}{total['rps']:>9.1f}{total['errors']:>6}")
+
+def compare(result: dict, baseline: dict, threshold: float, min_samples: int = 20) -> list[str]:
+    """Endpoints whose p95 grew, or whose throughput dropped, by more than `threshold`."""
+    regressions = []
+    for label, base in baseline["endpoints"].items():
+        cur = result["endpoints"].get(label)
+        if cur is None or min(cur["n"], base["n"]) < min_samples:
+            continue
+        if cur["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{label}: p95 {base['p95_ms']:.1f}ms -> {cur['p95_ms']:.1f}ms")
+        if cur["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{label}: throughput {base['rps']:.1f}/s -> {cur['rps']:.1f}/s")
+    return regressions
+
+async def prepare_database(scale_name: str, seed_value: int) -> None:
+    from sqlmodel import func, select
+    from app import stats
+    from app.database import SessionLocal, init_db
+    from app.models import Lead
+    from bench.datasets import SCALES, seed_scale
+
+    await init_db()
+    async with SessionLocal() as session:
+        if (await session.exec(select(func.count()).select_from(Lead))).one():
+            print("dataset already present, skipping seed")
+            return
+    scale = SCALES[scale_name]
+    t0 = time.perf_counter()
+    await seed_scale(scale, seed_value)
+    async with SessionLocal() as session:
+        await stats.reconcile(session)
+    print(f"seeded {scale.users} users / {scale.leads} leads / {scale.activities} activities "
+          f"in {time.perf_counter() - t0:.1f}s")
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@asynccontextmanager
+async def target(args):
+    import httpx
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=120) as client:
+            yield client, args.url
+        return
+    if args.uvicorn:
+        port = free_port()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            cwd=ROOT, env=os.environ.copy(),
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+                for _ in range(100):
+                    try:
+                        if (await client.get("/")).status_code == 200:
+                            break
+                    except httpx.TransportError:
+                        pass
+                    await asyncio.sleep(0.1)
+                else:
+                    raise RuntimeError("uvicorn did not come up")
+                yield client, base_url
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+        return
+    from app.main import app
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        yield client, "asgi"
+
+async def bootstrap(client, n_users: int) -> tuple[list[str], list[int]]:
+    from bench.datasets import PASSWORD
+
+    tokens = []
+    for i in range(n_users):
+        r = await client.post("/api/users/login", json={"username": f"bench{i}", "password": PASSWORD})
+        r.raise_for_status()
+        tokens.append(r.json()["access_token"])
+    headers = {"Authorization": f"Bearer {tokens[0]}"}
+    lead_ids, cursor = [], ""
+    while len(lead_ids) < 2000 and cursor is not None:
+        page = (await client.get("/api/leads", params={"size": 200, "cursor": cursor}, headers=headers)).json()
+        lead_ids += [lead["id"] for lead in page["items"]]
+        cursor = page["next_cursor"]
+    if not lead_ids:
+        raise RuntimeError("no active leads to drive the scenario with")
+    return tokens, lead_ids
+
+async def drive(ctx: Context, mix: dict[str, int], concurrency: int, duration: float, warmup: float, seed_value: int):
+    names, weights = list(mix), list(mix.values())
+    samples: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    started = time.perf_counter()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+
+    async def worker(rng: random.Random):
+        while True:
+            t0 = time.perf_counter()
+            if t0 >= deadline:
+                return
+            label, resp = await OPERATIONS[rng.choices(names, weights)[0]](ctx, rng)
+            if t0 < measure_from:
+                continue
+            samples.setdefault(label, []).append((time.perf_counter() - t0) * 1000)
+            # 404s are expected: another worker may have soft-deleted or never seen the lead
+            if resp.status_code >= 400 and resp.status_code != 404:
+                errors[label] = errors.get(label, 0) + 1
+
+    await asyncio.gather(*(worker(random.Random(seed_value + i)) for i in range(concurrency)))
+    return samples, errors, time.perf_counter() - measure_from
+
+async def run(args) -> int:
+    from bench.datasets import SCALES
+
+    if not args.no_seed:
+        await prepare_database(args.scale, args.seed)
+    async with target(args) as (client, target_name):
+        tokens, lead_ids = await bootstrap(client, min(args.users, SCALES[args.scale].users))
+        ctx = Context(client, tokens, lead_ids, args.import_rows)
+        samples, errors, elapsed = await drive(ctx, SCENARIOS[args.scenario], args.concurrency, args.duration, args.warmup, args.seed)
+
+    endpoints = summarize(samples, errors, elapsed)
+    n = sum(s["n"] for s in endpoints.values())
+    result = {
+        "meta": {
+            "scenario": args.scenario, "scale": args.scale, "target": target_name,
+            "concurrency": args.concurrency, "duration_s": args.duration,
+            "started_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "database": os.environ["DATABASE_URL"].split("://")[0],
+        },
+        "endpoints": endpoints,
+        "total": {"n": n, "rps": round(n / elapsed, 2), "errors": sum(s["errors"] for s in endpoints.values())},
+    }
+    print_report(result)
+
+    out = Path(args.out or ROOT / "bench" / "results" / f"{args.scenario}-{args.scale}-{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2))
+    print(f"\nresults written to {out}")
+    if args.save_baseline:
+        Path(args.save_baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save_baseline).write_text(json.dumps(result, indent=2))
+        print(f"baseline saved to {args.save_baseline}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        for key in ("scenario", "scale", "concurrency"):
+            if baseline["meta"][key] != result["meta"][key]:
+                print(f"warning: baseline {key}={baseline['meta'][key]!r}, this run {result['meta'][key]!r}")
+        regressions = compare(result, baseline, args.threshold)
+        print(f"\n{len(regressions)} regression(s) vs {args.baseline} (threshold {args.threshold:.0%})")
+        for line in regressions:
+            print(f"  {line}")
+        return 1 if regressions else 0
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", choices=["10k", "1m", "10m"], default="10k")
+    parser.add_argument("--scenario", choices=list(SCENARIOS), default="mixed")
+    parser.add_argument("--db", help="SQLite file to seed/reuse (default: throwaway file)")
+    parser.add_argument("--no-seed", action="store_true", help="use the database as-is")
+    parser.add_argument("--url", help="drive an already running server instead of the in-process app")
+    parser.add_argument("--uvicorn", action="store_true", help="start a local uvicorn on the same database")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--users", type=int, default=5, help="distinct logged-in users driving the load")
+    parser.add_argument("--import-rows", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="results JSON path (default: bench/results/<scenario>-<scale>-<ts>.json)")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--save-baseline", help="also write this run's results here")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed p95/throughput change vs baseline")
+    args = parser.parse_args()
+
+    # settings are read at import time, so pick the database before importing the app
+    if args.db:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(args.db).resolve()}"
+    os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+    return asyncio.run(run(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# Rows/s for 1k-row list pages: the old ORM + Pydantic path vs. column rows + orjson.
+#
+#   python -m bench.serialization --leads 20000 --page 1000
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import List
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlmodel import select
+from app.core.serialization import FastJSONResponse, row_dicts
+from app.database import SessionLocal, engine, init_db
+from app.models import Activity, Lead, User
+from app.queries import ACTIVITY_COLUMNS, LEAD_COLUMNS, activity_columns, lead_columns
+from app.schemas import ActivityOut, LeadOut
+from bench.datasets import seed
+
+async def legacy(model, out, page: int) -> bytes:
+    # what the handlers used to do: hydrate ORM objects, validate each row from
+    # __dict__, validate again as the response_model, then jsonable_encoder + json
+    adapter = TypeAdapter(List[out])
+    async with SessionLocal() as session:
+        rows = (await session.exec(select(model).order_by(model.id).limit(page))).all()
+        items = [out.model_validate(r.__dict__) for r in rows]
+        return json.dumps(jsonable_encoder(adapter.validate_python(items))).encode()
+
+async def fast(model, columns, names, page: int) -> bytes:
+    async with SessionLocal() as session:
+        rows = (await session.exec(select(*columns).order_by(model.id).limit(page))).all()
+        return FastJSONResponse(row_dicts(rows, names)).body
+
+async def rate(fn, page: int, reps: int) -> float:
+    await fn()  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        await fn()
+    return page * reps / (time.perf_counter() - t0)
+
+async def main(n_leads: int, page: int, reps: int) -> None:
+    await init_db()
+    async with engine.begin() as conn:
+        user_id = (await conn.execute(insert(User).values(
+            username="bench", email="bench@example.com", password_hash="x",
+            first_name="B", last_name="B", created_at=datetime.utcnow(),
+        ))).inserted_primary_key[0]
+    await seed(n_leads, n_leads, user_id)
+    for name, model, out, names, columns in (
+        ("leads", Lead, LeadOut, LEAD_COLUMNS, lead_columns()),
+        ("activities", Activity, ActivityOut, ACTIVITY_COLUMNS, activity_columns()),
+    ):
+        assert json.loads(await legacy(model, out, page)) == json.loads(await fast(model, columns, names, page))
+        before = await rate(lambda: legacy(model, out, page), page, reps)
+        after = await rate(lambda: fast(model, columns, names, page), page, reps)
+        print(f"{name:<11} {page}-row pages  before={before:>9,.0f} rows/s  after={after:>9,.0f} rows/s  x{after / before:.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leads", type=int, default=20_000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--reps", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(main(args.leads, args.page, args.reps))